@@ -6,17 +6,19 @@ from fastapi.staticfiles import StaticFiles
 
 from backend.config import settings
 from backend.database.db import init_db
+from backend.llm import close_llm_clients, init_llm_clients
 from backend.routes.main import api_router
 
 
 @asynccontextmanager
 async def setup(inner_app: FastAPI) -> AsyncGenerator:
     init_db()
-    # TODO: Add LLM API setup
+    init_llm_clients()
 
     inner_app.mount("/static", StaticFiles(directory="static"), name="static")
 
     yield
+    await close_llm_clients()
     # TODO: In the future release all resources if needed
 
 
@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncGenerator
+
+from bs4 import BeautifulSoup
+from playwright.async_api import async_playwright
+from playwright_stealth import Stealth
+
+from backend.config import settings
+from backend.llm.cache import llm_cache
+from backend.llm.cassette import CassetteMode, LLMCassette, use_llm_cassette
+from backend.llm.telemetry import llm_telemetry
+from backend.logging import get_logger
+from backend.scrapers.cassette import use_browser_cassette
+from backend.scrapers.cleaner import REMOVED_TAGS, clean_html
+from backend.scrapers.llm_scraper import LLMScraper
+from backend.scrapers.page_cache import install_mutation_counter, page_cache
+from backend.scrapers.resource_policy import (
+    collect_resource_stats,
+    get_resource_policy,
+    install_resource_policy,
+)
+from backend.scrapers.waits import collect_wait_stats
+
+logger = get_logger()
+
+LLM_CASSETTE_NAME = "llm.json"
+BROWSER_CASSETTE_NAME = "browser.har"
+METRICS = ("wall_time", "calls", "prompt_tokens", "completion_tokens", "cost")
+
+
+def _get_cost() -> float:
+    return sum(record.cost for record in llm_telemetry.records)
+
+
+class StageRecorder:
+    def __init__(self, cassette: LLMCassette) -> None:
+        self.cassette = cassette
+        self.stages: dict[str, dict[str, float]] = {}
+
+    @asynccontextmanager
+    async def stage(self, name: str) -> AsyncGenerator[None, None]:
+        before = self.cassette.stats()
+        cost_before = _get_cost()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            after = self.cassette.stats()
+            self.stages[name] = {
+                "wall_time": round(time.perf_counter() - start, 3),
+                **{
+                    metric: after[metric] - before[metric]
+                    for metric in (
+                        "calls",
+                        "prompt_tokens",
+                        "completion_tokens",
+                    )
+                },
+                "cost": round(_get_cost() - cost_before, 6),
+            }
+            logger.info(f"Stage {name}: {self.stages[name]}")
+
+
+async def run_benchmark(
+    url: str, cassette_dir: Path, mode: CassetteMode, max_jobs: int = 5
+) -> dict:
+    # Answers saved by previous runs would hide LLM calls from the report
+    llm_cache.persistent = False
+    llm_telemetry.reset()
+    wait_stats = collect_wait_stats()
+    resource_stats = collect_resource_stats()
+
+    with use_llm_cassette(cassette_dir / LLM_CASSETTE_NAME, mode) as cassette:
+        recorder = StageRecorder(cassette)
+        async with Stealth().use_async(async_playwright()) as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            context = await browser.new_context(locale="en-US")
+            await install_mutation_counter(context)
+            await use_browser_cassette(
+                context, cassette_dir / BROWSER_CASSETTE_NAME, mode
+            )
+            # Added after the cassette, so blocked requests never reach it
+            if settings.BLOCK_RESOURCES:
+                await install_resource_policy(context, get_resource_policy(url))
+            page = await context.new_page()
+            scraper = LLMScraper(
+                url=url,
+                email=settings.USER_EMAIL,
+                password=settings.PASSWORD,
+                context=context,
+                page=page,
+                website_info=None,
+            )
+
+            start = time.perf_counter()
+            async with recorder.stage("login_to_page"):
+                await scraper.login_to_page()
+            async with recorder.stage("get_job_entries"):
+                job_entries = await scraper.get_job_entries()
+            async with recorder.stage("process_and_evaluate_jobs"):
+                async for _ in scraper.process_and_evaluate_jobs(
+                    job_entries[:max_jobs]
+                ):
+                    pass
+            wall_time = time.perf_counter() - start
+
+            await context.close()
+            await browser.close()
+
+    return {
+        "url": url,
+        "mode": mode,
+        "wall_time": round(wall_time, 3),
+        "stages": recorder.stages,
+        "totals": cassette.stats(),
+        "calls_by_caller": llm_telemetry.summary(),
+        "page_cache": page_cache.stats(),
+        "waits": wait_stats.stats(),
+        "resources": resource_stats.stats(),
+    }
+
+
+def compare_with_baseline(
+    report: dict, baseline: dict, tolerance: float
+) -> list[str]:
+    regressions = []
+    for stage, metrics in report["stages"].items():
+        baseline_metrics = baseline.get("stages", {}).get(stage)
+        if not baseline_metrics:
+            continue
+        for metric in METRICS:
+            if metric not in baseline_metrics:
+                continue
+            if metrics[metric] > baseline_metrics[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{stage}.{metric}: {baseline_metrics[metric]} -> {metrics[metric]}"
+                )
+    return regressions
+
+
+def _legacy_clean_html(html: str) -> str:
+    # Previous get_page_content engine, kept as the reference point
+    soup = BeautifulSoup(html, "html.parser")
+    cleaned = ""
+    for tag in soup([tag for tag in REMOVED_TAGS if isinstance(tag, str)]):
+        tag.decompose()
+        cleaned = str(soup)
+    return cleaned
+
+
+def benchmark_cleaner(
+    paths: list[Path], repeat: int = 5, body_only: bool = False
+) -> dict:
+    engines = {
+        "clean_html": lambda html: clean_html(html, body_only=body_only),
+        "legacy": _legacy_clean_html,
+    }
+    pages = {}
+    for path in paths:
+        html = path.read_text(errors="ignore")
+        size_mb = len(html.encode()) / 1024 / 1024
+        page = {"size_mb": round(size_mb, 3)}
+        for name, engine in engines.items():
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                cleaned = engine(html)
+                times.append(time.perf_counter() - start)
+            page[name] = {
+                "ms_per_mb": round(min(times) * 1000 / size_mb, 1),
+                "output_ratio": round(len(cleaned) / len(html), 3),
+            }
+        pages[str(path)] = page
+        logger.info(f"Cleaned {path}: {page}")
+    return {"repeat": repeat, "body_only": body_only, "pages": pages}
+
+
+def _run_scraper_benchmark(args: argparse.Namespace) -> dict:
+    return asyncio.run(
+        run_benchmark(args.url, args.cassettes, args.mode, args.max_jobs)
+    )
+
+
+def _run_cleaner_benchmark(args: argparse.Namespace) -> dict:
+    return benchmark_cleaner(args.pages, args.repeat, args.body_only)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AutoApply benchmarks")
+    subparsers = parser.add_subparsers(required=True)
+
+    scraper_parser = subparsers.add_parser(
+        "scraper",
+        help="Run LLMScraper end-to-end against recorded LLM and browser cassettes",
+    )
+    scraper_parser.set_defaults(run=_run_scraper_benchmark)
+    scraper_parser.add_argument("url")
+    scraper_parser.add_argument(
+        "--cassettes", type=Path, default=Path("cassettes")
+    )
+    scraper_parser.add_argument(
+        "--mode",
+        type=CassetteMode,
+        choices=list(CassetteMode),
+        default=CassetteMode.replay,
+    )
+    scraper_parser.add_argument("--max-jobs", type=int, default=5)
+    scraper_parser.add_argument("--baseline", type=Path)
+    scraper_parser.add_argument("--tolerance", type=float, default=0.2)
+
+    cleaner_parser = subparsers.add_parser(
+        "cleaner", help="Measure time per MB of cleaning saved HTML pages"
+    )
+    cleaner_parser.set_defaults(run=_run_cleaner_benchmark, baseline=None)
+    cleaner_parser.add_argument("pages", type=Path, nargs="+")
+    cleaner_parser.add_argument("--repeat", type=int, default=5)
+    cleaner_parser.add_argument("--body-only", action="store_true")
+
+    for subparser in (scraper_parser, cleaner_parser):
+        subparser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = args.run(args)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        args.output.write_text(output)
+
+    if args.baseline:
+        regressions = compare_with_baseline(
+            report, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            logger.error(f"Performance regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
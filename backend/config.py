@@ -20,6 +20,58 @@ class Settings(BaseSettings):
     POSTGRES_DATABASE: str
     # TODO: Check if user can specify custom drivers, so that they would not break SQLAlchemy
     DRIVERNAME: str = "postgresql+psycopg"
+    LLM_CLASSIFY_MODEL: str = "gpt-5-nano-2025-08-07"
+    LLM_LOCATE_MODEL: str = "gpt-5-mini-2025-08-07"
+    LLM_EXTRACT_MODEL: str = "gpt-5-mini-2025-08-07"
+    LLM_GENERATE_CV_MODEL: str = "gpt-5-mini-2025-08-07"
+    LLM_ESCALATION_MODEL: str = "gpt-5-2025-08-07"
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_TIMEOUT: float = 120.0
+    LLM_ESTIMATED_OUTPUT_TOKENS: int = 1000
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PERSISTENT: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_MAX_PERSISTENT_ENTRIES: int = 50_000
+    LLM_CACHE_TTL: int = 7 * 24 * 60 * 60  # In seconds
+    # In seconds, the persistent cache is trimmed at most this often and the
+    # last access of an entry is only written when it is older than this
+    LLM_CACHE_EVICT_INTERVAL: int = 10 * 60
+    LLM_CACHE_TOUCH_INTERVAL: int = 60 * 60
+    # Calls are written to a JSONL file only when a path is set
+    LLM_TELEMETRY_PATH: str | None = None
+    LLM_TELEMETRY_MAX_RECORDS: int = 10_000
+    LLM_TELEMETRY_FLUSH_EVERY: int = 50
+    JOB_EVALUATION_BATCH_SIZE: int = 10
+    # Tabs that fetch job offers in parallel, reused between offers
+    JOB_PAGE_POOL_SIZE: int = 4
+    # Element search gets a JSON outline of visible elements instead of HTML
+    USE_PAGE_SNAPSHOT: bool = True
+    # Pages bigger than this are split and searched in parallel
+    LLM_CHUNK_TOKENS: int = 60_000
+    # Page type checks below this confidence are left to the LLM
+    PAGE_CLASSIFIER_MIN_CONFIDENCE: float = 0.8
+    # Websites scraped at the same time, each one in its own browser context
+    SCRAPE_MAX_CONCURRENT_SITES: int = 3
+    # In seconds, pages are settled once the network and the DOM are quiet
+    SETTLE_TIMEOUT: float = 10.0
+    SETTLE_DOM_QUIET: float = 0.5
+    # Animated pages never get quiet, so they are not waited for longer than
+    # the fixed sleep this replaced
+    SETTLE_DOM_TIMEOUT: float = 3.0
+    SETTLE_NETWORK_TIMEOUT: float = 3.0
+    DEBUG_HIGHLIGHT_DELAY: float = 1.0
+    # In seconds, recorded selectors that do not work give way to the next one
+    # quickly instead of waiting for the default 30s
+    REPLAY_ACTION_TIMEOUT: float = 3.0
+    # Clean logins in a row before a website gets a faster typing profile
+    TYPING_PROMOTION_LOGINS: int = 3
+    # Images, media, fonts and trackers are not downloaded by scraped pages
+    BLOCK_RESOURCES: bool = True
+    # Per site changes of the blocked resources, keyed by domain
+    RESOURCE_POLICY_OVERRIDES: dict[str, dict[str, list[str]]] = {}
 
     @computed_field
     @property
@@ -1,6 +1,10 @@
 from sqlmodel import Session, select
 
-from backend.database.models import UserModel
+from backend.database.models import (
+    AutomationSteps,
+    UserModel,
+    WebsiteModel,
+)
 
 
 def create_user(session: Session, user: UserModel) -> UserModel:
@@ -15,3 +19,14 @@ def delete_user(session: Session, email: str) -> None:
         session.exec(select(UserModel).where(UserModel.email == email)).first()
     )
     session.commit()
+
+
+def update_automation_steps(
+    session: Session, website: WebsiteModel, automation_steps: AutomationSteps
+) -> WebsiteModel:
+    # JSON column only notices a change when a new value is assigned
+    website.automation_steps = automation_steps.model_dump(mode="json")
+    session.add(website)
+    session.commit()
+    session.refresh(website)
+    return website
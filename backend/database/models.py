@@ -1,6 +1,6 @@
 import datetime
 from enum import StrEnum
-from typing import Annotated, Callable
+from typing import Annotated
 
 from pydantic import BaseModel, BeforeValidator, ConfigDict, EmailStr
 from sqlmodel import JSON, Column, Field, SQLModel
@@ -42,11 +42,9 @@ class JobEntryModel(SQLModel, table=True):
     )  # TODO: Here LLM will need to find information on the internet
 
 
-class JobEntry(SQLModel):
+class JobInformation(SQLModel):
     title: str
     company_name: str
-    discovery_date: datetime.date
-    job_url: str
     requirements: str
     duties: str
     about_project: str
@@ -59,6 +57,21 @@ class JobEntry(SQLModel):
     company_url: None | str
 
 
+class JobEntry(JobInformation):
+    discovery_date: datetime.date
+    job_url: str
+
+
+class JobEvaluation(SQLModel):
+    index: int
+    verdict: bool
+    score: int
+
+
+class JobEvaluations(SQLModel):
+    evaluations: list[JobEvaluation]
+
+
 class AttributeType(StrEnum):
     id = "id"
     text = "text"
@@ -66,24 +79,65 @@ class AttributeType(StrEnum):
     name = "name"
     element_type = "element_type"
     class_l = "class_l"
+    placeholder = "placeholder"
+    role = "role"  # "role:accessible name"
+    css_path = "css_path"
+
+
+class StepAction(StrEnum):
+    click = "click"
+    fill = "fill"
+    locate = "locate"
+
+
+class TypingProfile(StrEnum):
+    instant = "instant"
+    fast_human = "fast_human"
+    cautious = "cautious"
+
+
+class StepSelector(SQLModel):
+    html_element_attribute: str
+    attribute_type: AttributeType
+    successes: int = 0
+    failures: int = 0
+    last_verified: datetime.datetime | None = None
 
 
 class Step(SQLModel):
-    action: Callable
+    name: str
+    action: StepAction
     html_element_attribute: str  # TODO: Experiment with Locators too if you can
     attribute_type: AttributeType
-    arguments: dict
+    arguments: dict = {}
+    # Alternative selectors of the same element, tried before asking the LLM
+    selectors: list[StepSelector] = []
 
 
 class AutomationSteps(SQLModel):
-    login_to_page: list[Step]
-    is_on_login_page: list[Step]
-    navigate_to_login_page: list[Step]
-    pass_cookies_popup: list[Step]
-    navigate_to_job_list: list[Step]
-    get_job_entries: list[Step]
-    navigate_to_next_page: list[Step]
+    login_to_page: list[Step] = []
+    is_on_login_page: list[Step] = []
+    navigate_to_login_page: list[Step] = []
+    pass_cookies_popup: list[Step] = []
+    remove_popup: list[Step] = []
+    navigate_to_job_list: list[Step] = []
+    get_job_entries: list[Step] = []
+    navigate_to_next_page: list[Step] = []
     # TODO: Uncomment if this function gets html elements get_job_information: list[Step]
+    # Typing speed the website tolerates, kept with the steps in the JSON
+    # column, so existing databases need no new columns
+    typing_profile: TypingProfile = TypingProfile.cautious
+    # Logins in a row without any sign of bot detection
+    clean_logins: int = 0
+
+
+class LLMCacheEntryModel(SQLModel, table=True):
+    key: str = Field(primary_key=True, max_length=64)
+    response: str
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+    accessed_at: datetime.datetime = Field(
+        default_factory=datetime.datetime.now, index=True
+    )
 
 
 class UserModel(SQLModel, table=True):
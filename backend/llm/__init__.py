@@ -0,0 +1,381 @@
+# TODO: If not used, remove openai-agents from dependencies and add normal OpenAI
+# TODO: Remove dotenv and code related to it from this file, when app setup works fine
+import asyncio
+from typing import AsyncGenerator
+
+import httpx
+from openai import (
+    NOT_GIVEN,
+    AsyncOpenAI,
+    AuthenticationError,
+    DefaultAsyncHttpxClient,
+    RateLimitError,
+)
+from sqlmodel import SQLModel
+
+from backend.config import settings
+from backend.llm.cache import llm_cache, make_cache_key
+from backend.llm.cassette import CassetteMode, get_llm_cassette
+from backend.llm.rate_limit import Priority, rate_limiter
+from backend.llm.routing import CallClass, get_model
+from backend.llm.single_flight import single_flight
+from backend.llm.telemetry import LLMCallRecord, llm_telemetry, track_llm_call
+from backend.llm.tokens import count_tokens
+from backend.logging import get_logger
+
+BASE_URL = "https://api.llm7.io/v1"
+MODEL = "deepseek-r1-0528"
+logger = get_logger()
+
+_openai_client: AsyncOpenAI | None = None
+_llm7_client: AsyncOpenAI | None = None
+_semaphore: asyncio.Semaphore | None = None
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    return DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=settings.LLM_TIMEOUT,
+    )
+
+
+def init_llm_clients() -> None:
+    global _openai_client, _llm7_client, _semaphore
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=_create_http_client(),
+        )
+    if _llm7_client is None:
+        _llm7_client = AsyncOpenAI(
+            api_key=settings.API_KEY,
+            base_url=BASE_URL,
+            http_client=_create_http_client(),
+        )
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    logger.info(
+        f"LLM clients ready, max concurrency: {settings.LLM_MAX_CONCURRENCY}"
+    )
+
+
+async def close_llm_clients() -> None:
+    global _openai_client, _llm7_client, _semaphore
+    for client in (_openai_client, _llm7_client):
+        if client is not None:
+            await client.close()
+    _openai_client = None
+    _llm7_client = None
+    _semaphore = None
+    await llm_telemetry.flush()
+    logger.info(f"LLM metrics: {get_llm_metrics()}")
+
+
+def _get_client(use_openai: bool) -> AsyncOpenAI:
+    # Scrapers can also be run outside of the app (e.g. in tests), so clients
+    # are created on first use if the lifespan did not do it already
+    if _openai_client is None or _llm7_client is None:
+        init_llm_clients()
+    return _openai_client if use_openai else _llm7_client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    if _semaphore is None:
+        init_llm_clients()
+    return _semaphore
+
+
+async def send_req_to_llm(
+    prompt: str,
+    temperature: float = 1,
+    use_openai: bool = True,
+    use_json_schema: bool = False,
+    model: SQLModel | None = None,
+    retry: int = 3,
+    use_cache: bool = True,
+    priority: Priority = Priority.navigation,
+    json_schema: dict | None = None,
+    call_class: CallClass = CallClass.locate,
+    escalate: bool = False,
+) -> str:
+    # Only OpenAI supports structured outputs, so LLM7 always returns text
+    schema = model if use_json_schema and model and use_openai else None
+    model_name = get_model(call_class, escalate) if use_openai else MODEL
+    use_cache = use_cache and settings.LLM_CACHE_ENABLED
+    key = make_cache_key(
+        model_name=model_name,
+        prompt=prompt,
+        temperature=temperature,
+        schema=schema or json_schema,
+    )
+    async with track_llm_call(model_name, call_class) as record:
+        if use_cache:
+            cached = await llm_cache.get(key)
+            if cached is not None:
+                logger.debug(f"LLM cache hit: {key}")
+                record.cached = True
+                return schema.model_validate_json(cached) if schema else cached
+
+        output = await single_flight.do(
+            key,
+            lambda: _send_req_with_cassette(
+                key=key,
+                prompt=prompt,
+                model_name=model_name,
+                temperature=temperature,
+                use_openai=use_openai,
+                schema=schema,
+                retry=retry,
+                priority=priority,
+                json_schema=json_schema if use_openai else None,
+                record=record,
+            ),
+        )
+        if use_cache and output:
+            await llm_cache.set(
+                key, output.model_dump_json() if schema else output
+            )
+        return output
+
+
+async def forget_llm_response(
+    prompt: str,
+    temperature: float = 1,
+    use_openai: bool = True,
+    call_class: CallClass = CallClass.locate,
+    escalate: bool = False,
+) -> None:
+    # Answers that turned out to be wrong are not given again on the next run
+    if not settings.LLM_CACHE_ENABLED:
+        return
+    model_name = get_model(call_class, escalate) if use_openai else MODEL
+    await llm_cache.delete(make_cache_key(model_name, prompt, temperature))
+
+
+async def stream_req_to_llm(
+    prompt: str,
+    temperature: float = 1,
+    use_cache: bool = True,
+    priority: Priority = Priority.navigation,
+    call_class: CallClass = CallClass.locate,
+    escalate: bool = False,
+) -> AsyncGenerator[str, None]:
+    model_name = get_model(call_class, escalate)
+    use_cache = use_cache and settings.LLM_CACHE_ENABLED
+    key = make_cache_key(model_name, prompt, temperature)
+    async with track_llm_call(model_name, call_class) as record:
+        if use_cache:
+            cached = await llm_cache.get(key)
+            if cached is not None:
+                record.cached = True
+                yield cached
+                return
+
+        cassette = get_llm_cassette()
+        if cassette and cassette.mode == CassetteMode.replay:
+            interaction = cassette.replay_interaction(
+                key, model_name, record.caller
+            )
+            if interaction:
+                record.prompt_tokens = interaction.prompt_tokens
+                record.completion_tokens = interaction.completion_tokens
+            yield interaction.response if interaction else ""
+            return
+
+        client = _get_client(use_openai=True)
+        prompt_tokens = count_tokens(prompt)
+        tokens = prompt_tokens + settings.LLM_ESTIMATED_OUTPUT_TOKENS
+        await rate_limiter.acquire(tokens, priority)
+        headers = None
+        stream = None
+        usage = None
+        output = ""
+        try:
+            async with _get_semaphore():
+                raw_response = await client.responses.with_raw_response.create(
+                    model=model_name,
+                    input=prompt,
+                    temperature=temperature,
+                    stream=True,
+                )
+                headers = raw_response.headers
+                stream = raw_response.parse()
+                async for event in stream:
+                    if event.type == "response.output_text.delta":
+                        output += event.delta
+                        yield event.delta
+                    elif event.type == "response.completed":
+                        usage = event.response.usage
+            # Only responses that were read till the end are cached
+            if use_cache and output:
+                await llm_cache.set(key, output)
+        except RateLimitError as e:
+            logger.error(f"LLM error: {e}")
+            record.rate_limited += 1
+            await rate_limiter.penalize(e.response.headers)
+        except AuthenticationError as e:
+            logger.info(f"LLM error: {e}")
+        finally:
+            # Closing the stream early cancels generation of the rest of the
+            # answer
+            if stream is not None:
+                await stream.close()
+            await rate_limiter.release(tokens, headers)
+            if usage:
+                _record_usage(record, usage)
+            elif output:
+                # Stopped streams never get usage, so it is estimated
+                record.prompt_tokens = prompt_tokens
+                record.completion_tokens = count_tokens(output)
+            if cassette and output:
+                cassette.record(key, model_name, record.caller, prompt, output)
+
+
+async def _send_req_with_cassette(
+    key: str,
+    prompt: str,
+    model_name: str,
+    schema: type[SQLModel] | None,
+    record: LLMCallRecord,
+    **kwargs,
+) -> str:
+    cassette = get_llm_cassette()
+    if cassette and cassette.mode == CassetteMode.replay:
+        interaction = cassette.replay_interaction(
+            key, model_name, record.caller
+        )
+        if not interaction:
+            return ""
+        record.prompt_tokens = interaction.prompt_tokens
+        record.completion_tokens = interaction.completion_tokens
+        return (
+            schema.model_validate_json(interaction.response)
+            if schema
+            else interaction.response
+        )
+
+    output = await _send_req_to_llm(
+        prompt=prompt,
+        model_name=model_name,
+        schema=schema,
+        record=record,
+        **kwargs,
+    )
+    if cassette and output:
+        cassette.record(
+            key,
+            model_name,
+            record.caller,
+            prompt,
+            output.model_dump_json() if schema else output,
+        )
+    return output
+
+
+def get_llm_metrics() -> dict[str, dict]:
+    return {
+        "cache": llm_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "rate_limiter": {"rate_limited": rate_limiter.rate_limited},
+        "calls_by_caller": llm_telemetry.summary(),
+    }
+
+
+def _record_usage(record: LLMCallRecord, usage) -> None:
+    if usage:
+        record.prompt_tokens += usage.input_tokens
+        record.completion_tokens += usage.output_tokens
+
+
+async def _send_req_to_llm(
+    prompt: str,
+    model_name: str,
+    temperature: float,
+    use_openai: bool,
+    schema: type[SQLModel] | None,
+    retry: int,
+    priority: Priority,
+    record: LLMCallRecord,
+    json_schema: dict | None = None,
+) -> str:
+    response = ""
+    # Unlike parse, this only guides the output and leaves validation to caller
+    text_format = (
+        {
+            "format": {
+                "type": "json_schema",
+                "name": json_schema.get("title", "output"),
+                "schema": json_schema,
+                "strict": False,
+            }
+        }
+        if json_schema
+        else None
+    )
+
+    if use_openai:
+        client = _get_client(use_openai=True)
+        tokens = count_tokens(prompt) + settings.LLM_ESTIMATED_OUTPUT_TOKENS
+        attempts = retry
+        while not response and retry > 0:
+            record.retries = attempts - retry
+            await rate_limiter.acquire(tokens, priority)
+            headers = None
+            try:
+                async with _get_semaphore():
+                    if schema:
+                        raw_response = (
+                            await client.responses.with_raw_response.parse(
+                                model=model_name,
+                                input=prompt,
+                                temperature=temperature,
+                                text_format=schema,
+                            )
+                        )
+                        headers = raw_response.headers
+                        response = raw_response.parse()
+                        _record_usage(record, response.usage)
+                        if response.output_parsed:
+                            return response.output_parsed
+                    else:
+                        raw_response = (
+                            await client.responses.with_raw_response.create(
+                                model=model_name,
+                                input=prompt,
+                                temperature=temperature,
+                                text=text_format or NOT_GIVEN,
+                            )
+                        )
+                        headers = raw_response.headers
+                        response = raw_response.parse()
+                        _record_usage(record, response.usage)
+                        if response:
+                            return response.output_text
+            except RateLimitError as e:
+                logger.error(f"LLM error: {e}")
+                record.rate_limited += 1
+                await rate_limiter.penalize(e.response.headers)
+            except AuthenticationError as e:
+                logger.info(f"LLM error: {e}")
+            finally:
+                await rate_limiter.release(tokens, headers)
+            retry -= 1
+    else:
+        client = _get_client(use_openai=False)
+        try:
+            async with _get_semaphore():
+                response = await client.responses.create(
+                    model=model_name,
+                    input=prompt,
+                    # messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                )
+            _record_usage(record, response.usage)
+            return response.output_text
+        except Exception as e:
+            logger.info(f"LLM error: {e}")
+    return ""
@@ -0,0 +1,204 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlmodel import Session, SQLModel, col, delete, func, select
+
+from backend.config import settings
+from backend.database.db import engine
+from backend.database.models import LLMCacheEntryModel
+from backend.logging import get_logger
+
+logger = get_logger()
+
+
+def make_cache_key(
+    model_name: str,
+    prompt: str,
+    temperature: float,
+    schema: type[SQLModel] | dict | None = None,
+) -> str:
+    if isinstance(schema, type):
+        schema = schema.model_json_schema()
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "prompt": prompt,
+            "temperature": temperature,
+            "schema": schema,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    def __init__(
+        self,
+        max_entries: int,
+        max_persistent_entries: int,
+        ttl: int,
+        persistent: bool = True,
+        evict_interval: int = 0,
+        touch_interval: int = 0,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_persistent_entries = max_persistent_entries
+        self.ttl = ttl
+        self.persistent = persistent
+        self.evict_interval = evict_interval
+        self.touch_interval = touch_interval
+        self._evicted_at = 0.0
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.hits = 0
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry:
+            value, created_at = entry
+            if time.time() - created_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return value
+            del self._entries[key]
+
+        if self.persistent:
+            value = await asyncio.to_thread(self._get_persistent, key)
+            if value is not None:
+                self._set_memory(key, value)
+                self.hits += 1
+                self.persistent_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self._set_memory(key, value)
+        if self.persistent:
+            await asyncio.to_thread(self._set_persistent, key, value)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self.persistent:
+            await asyncio.to_thread(self._delete_persistent, key)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._entries),
+        }
+
+    def _set_memory(self, key: str, value: str) -> None:
+        self._entries[key] = (value, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_persistent(self, key: str) -> str | None:
+        try:
+            with Session(engine) as session:
+                entry = session.get(LLMCacheEntryModel, key)
+                if not entry:
+                    return None
+                now = datetime.datetime.now()
+                if (now - entry.created_at).total_seconds() >= self.ttl:
+                    session.delete(entry)
+                    session.commit()
+                    return None
+                # Last access only decides what is evicted first, so it is
+                # not written on every read
+                if (
+                    now - entry.accessed_at
+                ).total_seconds() >= self.touch_interval:
+                    entry.accessed_at = now
+                    session.add(entry)
+                    session.commit()
+                return entry.response
+        except OperationalError as e:
+            logger.error(
+                f"Could not connect to database, disabling persistent LLM cache: {e}"
+            )
+            self.persistent = False
+        except SQLAlchemyError as e:
+            logger.error(f"Could not read LLM response from cache: {e}")
+        return None
+
+    def _set_persistent(self, key: str, value: str) -> None:
+        try:
+            with Session(engine) as session:
+                session.merge(LLMCacheEntryModel(key=key, response=value))
+                session.commit()
+                if time.time() - self._evicted_at >= self.evict_interval:
+                    self._evicted_at = time.time()
+                    self._evict_persistent(session)
+        except OperationalError as e:
+            logger.error(
+                f"Could not connect to database, disabling persistent LLM cache: {e}"
+            )
+            self.persistent = False
+        except SQLAlchemyError as e:
+            logger.error(f"Could not save LLM response to cache: {e}")
+
+    def _delete_persistent(self, key: str) -> None:
+        try:
+            with Session(engine) as session:
+                session.exec(
+                    delete(LLMCacheEntryModel).where(
+                        col(LLMCacheEntryModel.key) == key
+                    )
+                )
+                session.commit()
+        except OperationalError as e:
+            logger.error(
+                f"Could not connect to database, disabling persistent LLM cache: {e}"
+            )
+            self.persistent = False
+        except SQLAlchemyError as e:
+            logger.error(f"Could not delete LLM response from cache: {e}")
+
+    def _evict_persistent(self, session: Session) -> None:
+        expired_before = datetime.datetime.now() - datetime.timedelta(
+            seconds=self.ttl
+        )
+        session.exec(
+            delete(LLMCacheEntryModel).where(
+                col(LLMCacheEntryModel.created_at) < expired_before
+            )
+        )
+        count = session.exec(
+            select(func.count()).select_from(LLMCacheEntryModel)
+        ).one()
+        if count > self.max_persistent_entries:
+            overflow = session.exec(
+                select(LLMCacheEntryModel.key)
+                .order_by(col(LLMCacheEntryModel.accessed_at))
+                .limit(count - self.max_persistent_entries)
+            ).all()
+            session.exec(
+                delete(LLMCacheEntryModel).where(
+                    col(LLMCacheEntryModel.key).in_(overflow)
+                )
+            )
+        session.commit()
+
+
+llm_cache = LLMCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    max_persistent_entries=settings.LLM_CACHE_MAX_PERSISTENT_ENTRIES,
+    ttl=settings.LLM_CACHE_TTL,
+    persistent=settings.LLM_CACHE_PERSISTENT,
+    evict_interval=settings.LLM_CACHE_EVICT_INTERVAL,
+    touch_interval=settings.LLM_CACHE_TOUCH_INTERVAL,
+)
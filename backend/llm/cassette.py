@@ -0,0 +1,161 @@
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from enum import StrEnum
+from pathlib import Path
+from typing import Generator
+
+from sqlmodel import SQLModel
+
+from backend.llm.tokens import count_tokens
+from backend.logging import get_logger
+
+logger = get_logger()
+
+CASSETTE_VERSION = 1
+
+
+class CassetteMode(StrEnum):
+    record = "record"
+    replay = "replay"
+
+
+class LLMInteraction(SQLModel):
+    key: str
+    model: str
+    caller: str = ""
+    prompt: str
+    response: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class LLMCassetteFile(SQLModel):
+    version: int = CASSETTE_VERSION
+    interactions: list[LLMInteraction] = []
+
+
+class LLMCassette:
+    def __init__(self, path: Path, mode: CassetteMode) -> None:
+        self.path = path
+        self.mode = mode
+        self.interactions: list[LLMInteraction] = []
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.misses = 0
+        self._by_key: dict[str, deque[LLMInteraction]] = defaultdict(deque)
+        self._by_caller: dict[tuple[str, str], deque[LLMInteraction]] = (
+            defaultdict(deque)
+        )
+        self._used: set[int] = set()
+
+        if mode == CassetteMode.replay:
+            cassette = LLMCassetteFile.model_validate_json(path.read_text())
+            if cassette.version != CASSETTE_VERSION:
+                raise ValueError(
+                    f"Cassette {path} has version {cassette.version}, expected {CASSETTE_VERSION}, record it again"
+                )
+            self.interactions = cassette.interactions
+            for interaction in self.interactions:
+                self._by_key[interaction.key].append(interaction)
+                self._by_caller[interaction.caller, interaction.model].append(
+                    interaction
+                )
+
+    def replay_interaction(
+        self, key: str, model: str, caller: str
+    ) -> LLMInteraction | None:
+        interactions = self._by_key.get(key)
+        if interactions:
+            interaction = interactions.popleft()
+            # Identical requests are answered in the order they were recorded,
+            # the last answer is reused if there are more of them now
+            if not interactions:
+                interactions.append(interaction)
+        else:
+            # Prompts with volatile page content (e.g. timestamps) will not
+            # match, so fall back to the order in which the same caller asked
+            # the same model, other websites running concurrently do not
+            # change it
+            interaction = self._next_unused(caller, model)
+            if interaction is None:
+                self.misses += 1
+                logger.error(
+                    f"No recorded LLM response left for: {key} from {caller}"
+                )
+                return None
+            logger.warning(
+                f"No recorded LLM response for: {key}, using the next one of {caller}"
+            )
+        self._used.add(id(interaction))
+        self._count(interaction)
+        return interaction
+
+    def _next_unused(self, caller: str, model: str) -> LLMInteraction | None:
+        interactions = self._by_caller.get((caller, model))
+        while interactions:
+            interaction = interactions.popleft()
+            if id(interaction) not in self._used:
+                return interaction
+        return None
+
+    def record(
+        self, key: str, model: str, caller: str, prompt: str, response: str
+    ) -> None:
+        interaction = LLMInteraction(
+            key=key,
+            model=model,
+            caller=caller,
+            prompt=prompt,
+            response=response,
+            prompt_tokens=count_tokens(prompt),
+            completion_tokens=count_tokens(response),
+        )
+        self.interactions.append(interaction)
+        self._count(interaction)
+
+    def save(self) -> None:
+        if self.mode != CassetteMode.record:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            LLMCassetteFile(interactions=self.interactions).model_dump_json(
+                indent=2
+            )
+        )
+        logger.info(
+            f"Saved {len(self.interactions)} LLM interactions to {self.path}"
+        )
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "misses": self.misses,
+        }
+
+    def _count(self, interaction: LLMInteraction) -> None:
+        self.calls += 1
+        self.prompt_tokens += interaction.prompt_tokens
+        self.completion_tokens += interaction.completion_tokens
+
+
+_cassette: LLMCassette | None = None
+
+
+def get_llm_cassette() -> LLMCassette | None:
+    return _cassette
+
+
+@contextmanager
+def use_llm_cassette(
+    path: Path, mode: CassetteMode
+) -> Generator[LLMCassette, None, None]:
+    global _cassette
+    _cassette = LLMCassette(path, mode)
+    try:
+        yield _cassette
+    finally:
+        _cassette.save()
+        _cassette = None
@@ -0,0 +1,102 @@
+import re
+
+from backend.config import settings
+from backend.llm import stream_req_to_llm
+from backend.llm.cache import llm_cache, make_cache_key
+from backend.llm.rate_limit import Priority
+from backend.llm.routing import CallClass, get_model
+from backend.logging import get_logger
+
+logger = get_logger()
+
+# Lookahead makes sure that the whole token was received, e.g. "1" of "12"
+DECISION_PATTERN = re.compile(r"\b(true|false)(?=\W)", re.IGNORECASE)
+INDEX_PATTERN = re.compile(r"\b(\d+)(?=\D)")
+
+
+async def send_early_stop_req_to_llm(
+    prompt: str,
+    pattern: re.Pattern,
+    call_class: CallClass = CallClass.classify,
+    escalate: bool = False,
+    priority: Priority = Priority.navigation,
+    use_cache: bool = True,
+) -> str | None:
+    key = make_cache_key(get_model(call_class, escalate), prompt, 1)
+    response = ""
+    stream = stream_req_to_llm(
+        prompt=prompt,
+        call_class=call_class,
+        escalate=escalate,
+        priority=priority,
+        use_cache=use_cache,
+    )
+    try:
+        async for delta in stream:
+            response += delta
+            if match := pattern.search(response):
+                break
+        else:
+            match = pattern.search(f"{response}\n")
+    finally:
+        await stream.aclose()
+
+    if not match:
+        logger.info(f"No answer found in LLM response: {response}")
+        return None
+    if use_cache and settings.LLM_CACHE_ENABLED:
+        await llm_cache.set(key, match.group(1))
+    return match.group(1)
+
+
+async def forget_decision(
+    prompt: str, call_class: CallClass = CallClass.classify
+) -> None:
+    # Either model may have given the cached answer
+    if not settings.LLM_CACHE_ENABLED:
+        return
+    for escalate in (False, True):
+        await llm_cache.delete(
+            make_cache_key(get_model(call_class, escalate), prompt, 1)
+        )
+
+
+async def send_decision_req_to_llm(
+    prompt: str,
+    call_class: CallClass = CallClass.classify,
+    priority: Priority = Priority.navigation,
+    use_cache: bool = True,
+) -> bool:
+    for escalate in (False, True):
+        answer = await send_early_stop_req_to_llm(
+            prompt=prompt,
+            pattern=DECISION_PATTERN,
+            call_class=call_class,
+            escalate=escalate,
+            priority=priority,
+            use_cache=use_cache,
+        )
+        if answer is not None:
+            return answer.lower() == "true"
+        logger.info(f"Ambiguous LLM decision, escalate: {escalate}")
+    return False
+
+
+async def send_index_req_to_llm(
+    prompt: str,
+    call_class: CallClass = CallClass.locate,
+    priority: Priority = Priority.navigation,
+    use_cache: bool = True,
+) -> int | None:
+    for escalate in (False, True):
+        answer = await send_early_stop_req_to_llm(
+            prompt=prompt,
+            pattern=INDEX_PATTERN,
+            call_class=call_class,
+            escalate=escalate,
+            priority=priority,
+            use_cache=use_cache,
+        )
+        if answer is not None:
+            return int(answer)
+    return None
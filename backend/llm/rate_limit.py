@@ -0,0 +1,185 @@
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from collections.abc import Mapping
+from enum import IntEnum
+
+from backend.logging import get_logger
+
+logger = get_logger()
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class Priority(IntEnum):
+    # Lower value is admitted first
+    navigation = 0
+    extraction = 1
+
+
+def parse_duration(value: str | None) -> float:
+    # OpenAI sends reset times like "6m0s", "1.5s" or "20ms"
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return sum(
+        float(amount) * DURATION_UNITS[unit]
+        for amount, unit in DURATION_PATTERN.findall(value)
+    )
+
+
+def _parse_int(value: str | None) -> int | None:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    def __init__(self, default_delay: float = 10) -> None:
+        self.default_delay = default_delay
+        self.request_limit: int | None = None
+        self.token_limit: int | None = None
+        self.remaining_requests: int | None = None
+        self.remaining_tokens: int | None = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.rate_limited = 0
+        self._in_flight_requests = 0
+        self._in_flight_tokens = 0
+        self._waiting: list[tuple[int, int]] = []
+        self._counter = itertools.count()
+        self._condition: asyncio.Condition | None = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(
+        self, tokens: int, priority: Priority = Priority.navigation
+    ) -> None:
+        condition = self._get_condition()
+        entry = (priority, next(self._counter))
+        async with condition:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while not (
+                    self._waiting[0] == entry and self._has_budget(tokens)
+                ):
+                    try:
+                        await asyncio.wait_for(
+                            condition.wait(), timeout=self._time_to_reset()
+                        )
+                    except TimeoutError:
+                        pass
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                condition.notify_all()
+
+            self._consume(tokens)
+
+    async def release(
+        self, tokens: int, headers: Mapping[str, str] | None = None
+    ) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight_requests -= 1
+            self._in_flight_tokens -= tokens
+            if headers:
+                self._update_from_headers(headers)
+            condition.notify_all()
+
+    async def penalize(self, headers: Mapping[str, str] | None) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self.rate_limited += 1
+            headers = headers or {}
+            delay = (
+                parse_duration(headers.get("retry-after"))
+                or parse_duration(headers.get("x-ratelimit-reset-tokens"))
+                or self.default_delay
+            )
+            logger.info(f"Rate limited, pausing LLM calls for {delay} seconds")
+            self.remaining_tokens = 0
+            self.tokens_reset_at = max(
+                self.tokens_reset_at, time.monotonic() + delay
+            )
+            condition.notify_all()
+
+    def _has_budget(self, tokens: int) -> bool:
+        self._refill()
+        if self.remaining_requests is not None and self.remaining_requests < 1:
+            return False
+        if self.remaining_tokens is not None:
+            # A prompt bigger than the whole budget can only wait for a full one
+            needed = min(tokens, self.token_limit or tokens)
+            if self.remaining_tokens < needed:
+                return False
+        return True
+
+    def _consume(self, tokens: int) -> None:
+        self._in_flight_requests += 1
+        self._in_flight_tokens += tokens
+        if self.remaining_requests is not None:
+            self.remaining_requests -= 1
+        if self.remaining_tokens is not None:
+            self.remaining_tokens -= tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if (
+            self.remaining_requests is not None
+            and now >= self.requests_reset_at
+        ):
+            self.remaining_requests = self.request_limit
+        if self.remaining_tokens is not None and now >= self.tokens_reset_at:
+            self.remaining_tokens = self.token_limit
+
+    def _time_to_reset(self) -> float | None:
+        now = time.monotonic()
+        resets = [
+            reset_at - now
+            for reset_at in (self.requests_reset_at, self.tokens_reset_at)
+            if reset_at > now
+        ]
+        return min(resets) if resets else None
+
+    def _update_from_headers(self, headers: Mapping[str, str]) -> None:
+        now = time.monotonic()
+        request_limit = _parse_int(headers.get("x-ratelimit-limit-requests"))
+        token_limit = _parse_int(headers.get("x-ratelimit-limit-tokens"))
+        remaining_requests = _parse_int(
+            headers.get("x-ratelimit-remaining-requests")
+        )
+        remaining_tokens = _parse_int(
+            headers.get("x-ratelimit-remaining-tokens")
+        )
+
+        if request_limit is not None:
+            self.request_limit = request_limit
+        if token_limit is not None:
+            self.token_limit = token_limit
+        # Headers do not know about requests that are still in flight
+        if remaining_requests is not None:
+            self.remaining_requests = (
+                remaining_requests - self._in_flight_requests
+            )
+            self.requests_reset_at = now + parse_duration(
+                headers.get("x-ratelimit-reset-requests")
+            )
+        if remaining_tokens is not None:
+            self.remaining_tokens = remaining_tokens - self._in_flight_tokens
+            self.tokens_reset_at = now + parse_duration(
+                headers.get("x-ratelimit-reset-tokens")
+            )
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,22 @@
+from enum import StrEnum
+
+from backend.config import settings
+
+
+class CallClass(StrEnum):
+    classify = "classify"
+    locate = "locate"
+    extract = "extract"
+    generate_cv = "generate_cv"
+
+
+def get_model(call_class: CallClass, escalate: bool = False) -> str:
+    if escalate:
+        return settings.LLM_ESCALATION_MODEL
+    models = {
+        CallClass.classify: settings.LLM_CLASSIFY_MODEL,
+        CallClass.locate: settings.LLM_LOCATE_MODEL,
+        CallClass.extract: settings.LLM_EXTRACT_MODEL,
+        CallClass.generate_cv: settings.LLM_GENERATE_CV_MODEL,
+    }
+    return models[call_class]
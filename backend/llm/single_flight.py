@@ -0,0 +1,38 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from backend.logging import get_logger
+
+logger = get_logger()
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, function: Callable[[], Awaitable[Any]]) -> Any:
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            logger.debug(f"Joining in-flight LLM request: {key}")
+            return await asyncio.shield(in_flight)
+
+        self.calls += 1
+        task = asyncio.ensure_future(function())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded, so that a cancelled caller does not cancel the request for
+        # everyone else waiting for it
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+
+single_flight = SingleFlight()
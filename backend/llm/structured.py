@@ -0,0 +1,140 @@
+import json
+import re
+from typing import TypeVar
+
+from pydantic import ValidationError
+from sqlmodel import SQLModel
+
+from backend.config import settings
+from backend.llm import send_req_to_llm
+from backend.llm.cache import llm_cache, make_cache_key
+from backend.llm.rate_limit import Priority
+from backend.llm.routing import CallClass, get_model
+from backend.logging import get_logger
+
+logger = get_logger()
+
+T = TypeVar("T", bound=SQLModel)
+
+CODE_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+
+def load_json_reply(response: str) -> dict | None:
+    # Models sometimes wrap JSON in markdown fences or add a sentence around it
+    if not response:
+        return None
+    fenced = CODE_FENCE_PATTERN.search(response)
+    candidates = [fenced.group(1)] if fenced else []
+    candidates.append(response)
+    start, end = response.find("{"), response.rfind("}")
+    if 0 <= start < end:
+        candidates.append(response[start : end + 1])
+
+    for candidate in candidates:
+        try:
+            reply = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(reply, dict):
+            return reply
+    return None
+
+
+def _get_fields_schema(schema: dict, fields: list[str]) -> dict:
+    fields_schema = {
+        "title": schema.get("title", "output"),
+        "type": "object",
+        "properties": {
+            field: schema["properties"][field]
+            for field in fields
+            if field in schema.get("properties", {})
+        },
+        "required": fields,
+    }
+    if "$defs" in schema:
+        fields_schema["$defs"] = schema["$defs"]
+    return fields_schema
+
+
+async def send_structured_req_to_llm(
+    prompt: str,
+    model: type[T],
+    temperature: float = 1,
+    retry: int = 3,
+    use_cache: bool = True,
+    priority: Priority = Priority.navigation,
+    call_class: CallClass = CallClass.extract,
+) -> T | None:
+    use_cache = use_cache and settings.LLM_CACHE_ENABLED
+    key = make_cache_key(get_model(call_class), prompt, temperature, model)
+    if use_cache:
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            return model.model_validate_json(cached)
+
+    schema = model.model_json_schema()
+    data: dict = {}
+    # None means that the whole object is requested, otherwise only the
+    # fields that failed validation are asked for again
+    invalid_fields: list[str] | None = None
+    feedback = ""
+
+    for attempt in range(retry):
+        if invalid_fields is None:
+            request_prompt = f"{prompt}{feedback}"
+            request_schema = schema
+        else:
+            request_prompt = f"{prompt}\nThese fields were already extracted: {json.dumps(data, default=str)}\nReturn JSON only with these fields fixed: {invalid_fields}.{feedback}"
+            request_schema = _get_fields_schema(schema, invalid_fields)
+
+        response = await send_req_to_llm(
+            prompt=request_prompt,
+            temperature=temperature,
+            json_schema=request_schema,
+            use_cache=False,
+            priority=priority,
+            call_class=call_class,
+            # A stronger model gets the retries after a failed attempt
+            escalate=attempt > 0,
+        )
+        reply = load_json_reply(response)
+        if reply is None:
+            logger.error(
+                f"LLM did not return JSON, attempt: {attempt}, response: {response}"
+            )
+            feedback = "\nYour previous answer was not valid JSON, return only a JSON object."
+            continue
+
+        if invalid_fields is None:
+            data = reply
+        else:
+            data.update(
+                {
+                    field: value
+                    for field, value in reply.items()
+                    if field in invalid_fields
+                }
+            )
+
+        try:
+            output = model.model_validate(data)
+        except ValidationError as e:
+            errors = e.errors()
+            invalid_fields = (
+                sorted(
+                    {str(error["loc"][0]) for error in errors if error["loc"]}
+                )
+                or None
+            )
+            feedback = f"\nYour previous answer had these validation errors: {[(error['loc'], error['msg']) for error in errors]}"
+            logger.error(
+                f"LLM output did not match {model.__name__}, attempt: {attempt}, fields: {invalid_fields}"
+            )
+            continue
+
+        if use_cache:
+            await llm_cache.set(key, output.model_dump_json())
+        return output
+
+    logger.error(f"Could not get valid {model.__name__} from LLM")
+    return None
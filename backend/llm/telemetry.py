@@ -0,0 +1,196 @@
+import asyncio
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncGenerator, Generator
+
+from sqlmodel import Field, SQLModel
+
+from backend.config import settings
+from backend.logging import get_logger
+
+logger = get_logger()
+
+# USD per 1M input and output tokens, the longest matching prefix is used
+MODEL_PRICES = {
+    "gpt-5-nano": (0.05, 0.40),
+    "gpt-5-mini": (0.25, 2.00),
+    "gpt-5": (1.25, 10.00),
+}
+
+# Frames of these modules only pass the call through
+SKIPPED_MODULES = ("backend.llm", "contextlib", "asyncio")
+
+_caller_tag: ContextVar[str | None] = ContextVar("llm_caller_tag", default=None)
+
+
+class LLMCallRecord(SQLModel):
+    timestamp: datetime = Field(default_factory=datetime.now)
+    caller: str
+    model: str
+    call_class: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+    retries: int = 0
+    rate_limited: int = 0
+    cached: bool = False
+    cost: float = 0.0
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, completion_tokens: int
+) -> float:
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(prefix):
+            input_price, output_price = MODEL_PRICES[prefix]
+            return (
+                prompt_tokens * input_price + completion_tokens * output_price
+            ) / 1_000_000
+    return 0.0
+
+
+@contextmanager
+def llm_caller(tag: str) -> Generator[None, None, None]:
+    token = _caller_tag.set(tag)
+    try:
+        yield
+    finally:
+        _caller_tag.reset(token)
+
+
+def get_caller() -> str:
+    tag = _caller_tag.get()
+    if tag:
+        return tag
+
+    # Scraper methods are what we want to compare, so the closest one on the
+    # stack wins over helpers like the ones in scrapers/utils.py
+    caller = "unknown"
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(SKIPPED_MODULES):
+            qualname = frame.f_code.co_qualname
+            if "Scraper." in qualname:
+                return qualname
+            if caller == "unknown":
+                caller = f"{module}.{qualname}"
+        frame = frame.f_back
+    return caller
+
+
+class LLMTelemetry:
+    def __init__(
+        self, max_records: int, flush_every: int, path: Path | None
+    ) -> None:
+        self.records: deque[LLMCallRecord] = deque(maxlen=max_records)
+        self.flush_every = flush_every
+        self.path = path
+        self._unflushed: list[LLMCallRecord] = []
+
+    async def add(self, record: LLMCallRecord) -> None:
+        record.cost = estimate_cost(
+            record.model, record.prompt_tokens, record.completion_tokens
+        )
+        self.records.append(record)
+        logger.debug(f"LLM call: {record.model_dump_json()}")
+        if self.path is None:
+            return
+        self._unflushed.append(record)
+        if len(self._unflushed) >= self.flush_every:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self.path is None or not self._unflushed:
+            return
+        records, self._unflushed = self._unflushed, []
+        lines = "".join(f"{record.model_dump_json()}\n" for record in records)
+        await asyncio.to_thread(self._write, lines)
+
+    def _write(self, lines: str) -> None:
+        with self.path.open("a") as file:
+            file.write(lines)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        summary: dict[str, dict[str, float]] = {}
+        for record in self.records:
+            stats = summary.setdefault(
+                record.caller,
+                {
+                    "calls": 0,
+                    "cached": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "latency": 0.0,
+                    "retries": 0,
+                    "rate_limited": 0,
+                    "cost": 0.0,
+                },
+            )
+            stats["calls"] += 1
+            stats["cached"] += record.cached
+            stats["prompt_tokens"] += record.prompt_tokens
+            stats["completion_tokens"] += record.completion_tokens
+            stats["latency"] += record.latency
+            stats["retries"] += record.retries
+            stats["rate_limited"] += record.rate_limited
+            stats["cost"] += record.cost
+        # Most expensive callers first, they are the ones worth caching
+        return dict(
+            sorted(
+                summary.items(), key=lambda item: item[1]["cost"], reverse=True
+            )
+        )
+
+    def reset(self) -> None:
+        self.records.clear()
+
+
+_run_telemetry: ContextVar[LLMTelemetry | None] = ContextVar(
+    "llm_run_telemetry", default=None
+)
+
+
+def collect_llm_calls() -> LLMTelemetry:
+    # Every scraping run summarizes only its own calls, tasks started after
+    # this inherit the collector, so concurrent runs of other users do not
+    # mix with it
+    run_telemetry = LLMTelemetry(
+        max_records=settings.LLM_TELEMETRY_MAX_RECORDS,
+        flush_every=settings.LLM_TELEMETRY_FLUSH_EVERY,
+        path=None,
+    )
+    _run_telemetry.set(run_telemetry)
+    return run_telemetry
+
+
+@asynccontextmanager
+async def track_llm_call(
+    model: str, call_class: str
+) -> AsyncGenerator[LLMCallRecord, None]:
+    record = LLMCallRecord(
+        caller=get_caller(), model=model, call_class=call_class
+    )
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.latency = time.perf_counter() - start
+        await llm_telemetry.add(record)
+        run_telemetry = _run_telemetry.get()
+        if run_telemetry is not None:
+            await run_telemetry.add(record)
+
+
+llm_telemetry = LLMTelemetry(
+    max_records=settings.LLM_TELEMETRY_MAX_RECORDS,
+    flush_every=settings.LLM_TELEMETRY_FLUSH_EVERY,
+    path=Path(settings.LLM_TELEMETRY_PATH)
+    if settings.LLM_TELEMETRY_PATH
+    else None,
+)
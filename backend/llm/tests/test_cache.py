@@ -0,0 +1,114 @@
+import datetime
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine, select
+
+import backend.llm.cache
+from backend.database.models import JobEntry, LLMCacheEntryModel
+from backend.llm.cache import LLMCache, make_cache_key
+
+
+@pytest.fixture
+def cache() -> LLMCache:
+    return LLMCache(
+        max_entries=2, max_persistent_entries=10, ttl=60, persistent=False
+    )
+
+
+def test_make_cache_key_depends_on_all_parts():
+    key = make_cache_key("model", "prompt", 1)
+    assert key == make_cache_key("model", "prompt", 1)
+    assert key != make_cache_key("other-model", "prompt", 1)
+    assert key != make_cache_key("model", "other prompt", 1)
+    assert key != make_cache_key("model", "prompt", 0.5)
+    assert key != make_cache_key("model", "prompt", 1, schema=JobEntry)
+
+
+@pytest.mark.asyncio
+async def test_cache_counts_hits_and_misses(cache):
+    assert await cache.get("key") is None
+    await cache.set("key", "value")
+    assert await cache.get("key") == "value"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used_entry(cache):
+    await cache.set("first", "1")
+    await cache.set("second", "2")
+    await cache.get("first")
+    await cache.set("third", "3")
+    assert await cache.get("second") is None
+    assert await cache.get("first") == "1"
+    assert await cache.get("third") == "3"
+
+
+@pytest.mark.asyncio
+async def test_cache_drops_expired_entries(cache):
+    cache.ttl = 0
+    await cache.set("key", "value")
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_deletes_entry(cache):
+    await cache.set("key", "value")
+    await cache.delete("key")
+    await cache.delete("missing")
+    assert await cache.get("key") is None
+
+
+@pytest.fixture
+def database(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    LLMCacheEntryModel.__table__.create(engine)
+    monkeypatch.setattr(backend.llm.cache, "engine", engine)
+    return engine
+
+
+def get_accessed_at(engine, key: str) -> datetime.datetime:
+    with Session(engine) as session:
+        return session.get(LLMCacheEntryModel, key).accessed_at
+
+
+@pytest.mark.asyncio
+async def test_persistent_cache_is_trimmed_at_most_once_per_interval(database):
+    cache = LLMCache(
+        max_entries=10, max_persistent_entries=2, ttl=60, evict_interval=60
+    )
+    for key in ("first", "second", "third"):
+        await cache.set(key, key)
+
+    # Table was trimmed on the first write only
+    with Session(database) as session:
+        assert len(session.exec(select(LLMCacheEntryModel)).all()) == 3
+
+    cache._evicted_at = 0
+    await cache.set("fourth", "fourth")
+    with Session(database) as session:
+        keys = session.exec(select(LLMCacheEntryModel.key)).all()
+    assert sorted(keys) == ["fourth", "third"]
+
+
+@pytest.mark.asyncio
+async def test_recent_access_is_not_written_again(database):
+    cache = LLMCache(
+        max_entries=10, max_persistent_entries=10, ttl=60, touch_interval=60
+    )
+    await cache.set("key", "value")
+    accessed_at = get_accessed_at(database, "key")
+
+    cache._entries.clear()
+    assert await cache.get("key") == "value"
+    assert get_accessed_at(database, "key") == accessed_at
+
+    cache.touch_interval = 0
+    cache._entries.clear()
+    assert await cache.get("key") == "value"
+    assert get_accessed_at(database, "key") > accessed_at
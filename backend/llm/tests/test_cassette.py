@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+import backend.llm
+import backend.llm.cassette
+from backend.llm import send_req_to_llm
+from backend.llm.cassette import CassetteMode, use_llm_cassette
+from backend.llm.telemetry import llm_caller
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(backend.llm.cassette, "count_tokens", len)
+    monkeypatch.setattr(backend.llm.settings, "LLM_CACHE_ENABLED", False)
+
+
+@pytest.mark.asyncio
+async def test_recorded_responses_are_replayed_without_network(
+    monkeypatch, tmp_path
+):
+    path = tmp_path / "llm.json"
+
+    async def fake_send_req_to_llm(prompt: str, **kwargs) -> str:
+        return f"answer to {prompt}"
+
+    monkeypatch.setattr(backend.llm, "_send_req_to_llm", fake_send_req_to_llm)
+    with use_llm_cassette(path, CassetteMode.record) as cassette:
+        assert await send_req_to_llm("first") == "answer to first"
+        assert await send_req_to_llm("second") == "answer to second"
+    assert cassette.stats()["calls"] == 2
+
+    async def no_network(prompt: str, **kwargs) -> str:
+        raise AssertionError("LLM was called during replay")
+
+    monkeypatch.setattr(backend.llm, "_send_req_to_llm", no_network)
+    with use_llm_cassette(path, CassetteMode.replay) as cassette:
+        assert await send_req_to_llm("second") == "answer to second"
+        assert await send_req_to_llm("first") == "answer to first"
+    assert cassette.stats() == {
+        "calls": 2,
+        "prompt_tokens": len("first") + len("second"),
+        "completion_tokens": len("answer to first") + len("answer to second"),
+        "misses": 0,
+    }
+
+
+def test_cassette_with_other_version_is_rejected(tmp_path):
+    path = tmp_path / "llm.json"
+    path.write_text('{"version": 0, "interactions": []}')
+    with pytest.raises(ValueError):
+        with use_llm_cassette(path, CassetteMode.replay):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_changed_prompts_fall_back_to_order_of_the_same_caller(
+    monkeypatch, tmp_path
+):
+    path = tmp_path / "llm.json"
+
+    async def fake_send_req_to_llm(prompt: str, **kwargs) -> str:
+        return f"answer to {prompt}"
+
+    async def ask(caller: str, prompts: list[str]) -> list[str]:
+        with llm_caller(caller):
+            return [await send_req_to_llm(prompt) for prompt in prompts]
+
+    monkeypatch.setattr(backend.llm, "_send_req_to_llm", fake_send_req_to_llm)
+    with use_llm_cassette(path, CassetteMode.record):
+        await ask("first site", ["a 1", "b 1"])
+        await ask("second site", ["c 1"])
+
+    # Timestamps in the page content changed, and the websites run
+    # concurrently in the other order now
+    with use_llm_cassette(path, CassetteMode.replay) as cassette:
+        second, first = await asyncio.gather(
+            ask("second site", ["c 2"]), ask("first site", ["a 1", "b 2"])
+        )
+        assert await ask("first site", ["d 2"]) == [""]
+    assert first == ["answer to a 1", "answer to b 1"]
+    assert second == ["answer to c 1"]
+    assert cassette.stats()["misses"] == 1
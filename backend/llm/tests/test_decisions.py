@@ -0,0 +1,94 @@
+import pytest
+
+from backend.llm import decisions
+from backend.llm.decisions import (
+    DECISION_PATTERN,
+    INDEX_PATTERN,
+    send_early_stop_req_to_llm,
+)
+
+
+class FakeStream:
+    def __init__(self, deltas: list[str]) -> None:
+        self.deltas = deltas
+        self.sent = 0
+        self.closed = False
+
+    async def stream_req_to_llm(self, **kwargs):
+        try:
+            for delta in self.deltas:
+                self.sent += 1
+                yield delta
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    def make(deltas: list[str]) -> FakeStream:
+        stream = FakeStream(deltas)
+        monkeypatch.setattr(
+            decisions, "stream_req_to_llm", stream.stream_req_to_llm
+        )
+        return stream
+
+    return make
+
+
+def test_patterns_match_only_complete_tokens():
+    assert DECISION_PATTERN.search("Tru") is None
+    assert DECISION_PATTERN.search("True") is None
+    assert DECISION_PATTERN.search("True.").group(1) == "True"
+    assert DECISION_PATTERN.search("Answer: false\n").group(1) == "false"
+    assert DECISION_PATTERN.search("untrue ") is None
+    assert INDEX_PATTERN.search("1") is None
+    assert INDEX_PATTERN.search("12 ").group(1) == "12"
+
+
+@pytest.mark.asyncio
+async def test_stops_at_first_complete_token(stream):
+    fake = stream(["Tr", "ue", ", because", " the page", " has a form"])
+
+    answer = await send_early_stop_req_to_llm(
+        "prompt", DECISION_PATTERN, use_cache=False
+    )
+
+    assert answer == "True"
+    assert fake.sent == 3
+    assert fake.closed
+
+
+@pytest.mark.asyncio
+async def test_does_not_stop_on_prefix_of_longer_index(stream):
+    fake = stream(["1", "2", " is the", " right one"])
+
+    answer = await send_early_stop_req_to_llm(
+        "prompt", INDEX_PATTERN, use_cache=False
+    )
+
+    assert answer == "12"
+    assert fake.sent == 3
+
+
+@pytest.mark.asyncio
+async def test_bare_token_at_end_of_stream(stream):
+    fake = stream(["Tr", "ue"])
+
+    answer = await send_early_stop_req_to_llm(
+        "prompt", DECISION_PATTERN, use_cache=False
+    )
+
+    assert answer == "True"
+    assert fake.sent == 2
+
+
+@pytest.mark.asyncio
+async def test_no_answer_in_stream(stream):
+    stream(["I", " am not sure"])
+
+    assert (
+        await send_early_stop_req_to_llm(
+            "prompt", DECISION_PATTERN, use_cache=False
+        )
+        is None
+    )
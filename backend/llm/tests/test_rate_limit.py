@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from backend.llm.rate_limit import Priority, RateLimiter, parse_duration
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("6m0s", 360),
+        ("1.5s", 1.5),
+        ("20ms", 0.02),
+        ("1h2m3s", 3723),
+        ("2", 2),
+        ("", 0),
+        (None, 0),
+    ],
+)
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == pytest.approx(expected)
+
+
+@pytest.mark.asyncio
+async def test_navigation_calls_are_admitted_before_extraction_calls():
+    limiter = RateLimiter()
+    await limiter.acquire(100)
+    await limiter.release(
+        100,
+        {
+            "x-ratelimit-limit-tokens": "1000",
+            "x-ratelimit-remaining-tokens": "150",
+            "x-ratelimit-reset-tokens": "100ms",
+        },
+    )
+    order = []
+
+    async def call(priority: Priority, name: str) -> None:
+        await limiter.acquire(100, priority)
+        order.append(name)
+        await limiter.release(100)
+
+    await asyncio.gather(
+        call(Priority.extraction, "extraction-1"),
+        call(Priority.extraction, "extraction-2"),
+        call(Priority.navigation, "navigation"),
+    )
+    assert order == ["extraction-1", "navigation", "extraction-2"]
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from backend.llm.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_with_same_key_share_one_request():
+    single_flight = SingleFlight()
+    requests = 0
+
+    async def request() -> str:
+        nonlocal requests
+        requests += 1
+        await asyncio.sleep(0.01)
+        return "response"
+
+    results = await asyncio.gather(
+        *(single_flight.do("key", request) for _ in range(5)),
+        single_flight.do("other key", request),
+    )
+
+    assert results == ["response"] * 6
+    assert requests == 2
+    assert single_flight.stats() == {
+        "calls": 2,
+        "coalesced": 4,
+        "in_flight": 0,
+    }
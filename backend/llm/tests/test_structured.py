@@ -0,0 +1,84 @@
+import pytest
+from sqlmodel import SQLModel
+
+from backend.llm import structured
+from backend.llm.structured import load_json_reply, send_structured_req_to_llm
+
+
+class Offer(SQLModel):
+    title: str
+    salary: int
+    remote: bool
+
+
+class FakeLLM:
+    def __init__(self) -> None:
+        self.responses: list[str] = []
+        self.requests: list[dict] = []
+
+    async def send_req_to_llm(self, **kwargs) -> str:
+        self.requests.append(kwargs)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def llm(monkeypatch) -> FakeLLM:
+    llm = FakeLLM()
+    monkeypatch.setattr(structured, "send_req_to_llm", llm.send_req_to_llm)
+    return llm
+
+
+def test_load_json_reply_from_fenced_reply():
+    reply = 'Here it is:\n```json\n{"title": "Engineer"}\n```'
+    assert load_json_reply(reply) == {"title": "Engineer"}
+
+
+def test_load_json_reply_from_reply_with_prose():
+    reply = 'Sure! {"title": "Engineer", "salary": 100} Hope that helps.'
+    assert load_json_reply(reply) == {"title": "Engineer", "salary": 100}
+
+
+def test_load_json_reply_without_object():
+    assert load_json_reply("") is None
+    assert load_json_reply("No offer found") is None
+    assert load_json_reply("[1, 2]") is None
+
+
+@pytest.mark.asyncio
+async def test_only_invalid_fields_are_repaired(llm):
+    llm.responses = [
+        '{"title": "Engineer", "salary": "a lot", "remote": true}',
+        '```json\n{"salary": 120, "title": "Changed"}\n```',
+    ]
+
+    offer = await send_structured_req_to_llm("Extract", Offer, use_cache=False)
+
+    assert offer == Offer(title="Engineer", salary=120, remote=True)
+    repair = llm.requests[1]
+    assert list(repair["json_schema"]["properties"]) == ["salary"]
+    assert repair["json_schema"]["required"] == ["salary"]
+    assert repair["escalate"]
+
+
+@pytest.mark.asyncio
+async def test_reply_without_json_is_requested_again(llm):
+    llm.responses = [
+        "I cannot do that",
+        '{"title": "Engineer", "salary": 100, "remote": false}',
+    ]
+
+    offer = await send_structured_req_to_llm("Extract", Offer, use_cache=False)
+
+    assert offer == Offer(title="Engineer", salary=100, remote=False)
+    assert "not valid JSON" in llm.requests[1]["prompt"]
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_retries(llm):
+    llm.responses = ['{"title": "Engineer"}', "{}", "{}"]
+
+    assert (
+        await send_structured_req_to_llm("Extract", Offer, use_cache=False)
+        is None
+    )
+    assert len(llm.requests) == 3
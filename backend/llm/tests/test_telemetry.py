@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+import backend.llm.telemetry
+from backend.llm.telemetry import (
+    LLMCallRecord,
+    LLMTelemetry,
+    collect_llm_calls,
+    estimate_cost,
+    get_caller,
+    llm_caller,
+    track_llm_call,
+)
+
+
+class FakeScraper:
+    def login(self) -> str:
+        return self._helper()
+
+    def _helper(self) -> str:
+        return helper()
+
+
+def helper() -> str:
+    return get_caller()
+
+
+def test_caller_is_closest_scraper_method():
+    assert FakeScraper().login() == "FakeScraper._helper"
+    assert helper().endswith("test_telemetry.helper")
+
+
+def test_caller_tag_overrides_stack():
+    with llm_caller("cv"):
+        assert FakeScraper().login() == "cv"
+
+
+def test_cost_uses_longest_matching_model_prefix():
+    assert estimate_cost("gpt-5-nano-2025-08-07", 1_000_000, 0) == 0.05
+    assert estimate_cost("gpt-5-2025-08-07", 0, 1_000_000) == 10.0
+    assert estimate_cost("deepseek-r1-0528", 1000, 1000) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_records_are_summarized_by_caller_and_flushed(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    telemetry = LLMTelemetry(max_records=2, flush_every=2, path=path)
+    for caller, cached in (("a", False), ("b", False), ("b", True)):
+        await telemetry.add(
+            LLMCallRecord(
+                caller=caller,
+                model="gpt-5-mini",
+                call_class="locate",
+                prompt_tokens=0 if cached else 1000,
+                cached=cached,
+            )
+        )
+
+    # The ring buffer keeps only the newest records
+    assert list(telemetry.summary()) == ["b"]
+    assert telemetry.summary()["b"]["calls"] == 2
+    assert telemetry.summary()["b"]["cached"] == 1
+    assert len(path.read_text().splitlines()) == 2
+    await telemetry.flush()
+    assert len(path.read_text().splitlines()) == 3
+
+
+@pytest.mark.asyncio
+async def test_tracked_call_is_attributed_past_context_manager(monkeypatch):
+    telemetry = LLMTelemetry(max_records=10, flush_every=10, path=None)
+    monkeypatch.setattr(backend.llm.telemetry, "llm_telemetry", telemetry)
+
+    async with track_llm_call("gpt-5-mini", "locate"):
+        pass
+
+    assert list(telemetry.summary()) == [
+        f"{__name__}.test_tracked_call_is_attributed_past_context_manager"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_collect_their_own_calls(monkeypatch):
+    telemetry = LLMTelemetry(max_records=10, flush_every=10, path=None)
+    monkeypatch.setattr(backend.llm.telemetry, "llm_telemetry", telemetry)
+
+    async def run(caller: str, calls: int) -> LLMTelemetry:
+        run_telemetry = collect_llm_calls()
+
+        async def call() -> None:
+            async with track_llm_call("gpt-5-mini", "locate"):
+                await asyncio.sleep(0)
+
+        with llm_caller(caller):
+            await asyncio.gather(*(call() for _ in range(calls)))
+        return run_telemetry
+
+    first, second = await asyncio.gather(run("first", 2), run("second", 1))
+
+    assert {
+        caller: stats["calls"] for caller, stats in first.summary().items()
+    } == {"first": 2}
+    assert {
+        caller: stats["calls"] for caller, stats in second.summary().items()
+    } == {"second": 1}
+    assert len(telemetry.records) == 3
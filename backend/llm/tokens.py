@@ -0,0 +1,13 @@
+from functools import cache
+
+import tiktoken
+
+
+@cache
+def get_tokenizer() -> tiktoken.Encoding:
+    # Loaded on first use, as tiktoken may need to download the encoding
+    return tiktoken.encoding_for_model("gpt-5-")
+
+
+def count_tokens(text: str) -> int:
+    return len(get_tokenizer().encode(text))
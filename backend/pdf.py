@@ -20,6 +20,7 @@ from backend.database.models import (
     UserModel,
 )
 from backend.llm import send_req_to_llm
+from backend.llm.routing import CallClass
 from backend.logging import get_logger
 from backend.scrapers.base_scraper import JobEntry
 
@@ -170,7 +171,7 @@ def _get_info_for_cv(user: UserModel, mode: str) -> dict[str, str]:
         return output
 
 
-def create_cv(
+async def create_cv(
     user: UserModel,
     job_entry: JobEntry,
     mode: str = "llm-selection",
@@ -188,18 +189,26 @@ def create_cv(
         name = info.get("name", "Jan Kolon Movano")
         links = info.get("links", "")
         prompt = f"Select skills and other qualifications from information: {skills} that match those of job requirements: {requirements}"
-        response = send_req_to_llm(prompt)
+        response = await send_req_to_llm(
+            prompt, call_class=CallClass.generate_cv
+        )
         prompt = f"Put all the relevant information: {skills}, {name}, {links}. Into this template: {TEMPLATE}\nWhere each {{}} tells you where to put which category of information"
-        cv = send_req_to_llm(prompt)
+        cv = await send_req_to_llm(prompt, call_class=CallClass.generate_cv)
     elif mode == "llm-generation":
         skills = info.get("skills", "")
         name = info.get("name", "Jan Kolon Movano")
         links = info.get("links", "")
         logger.info(f"name: {name}\nskills: {skills}\nlinks: {links}")
         prompt = f"Select skills and other qualifications from information: {skills} that match those of job requirements: {requirements}"
-        response = send_req_to_llm(prompt)
+        response = await send_req_to_llm(
+            prompt, call_class=CallClass.generate_cv
+        )
         prompt = f"Generate a complete personal CV page using only HTML and CSS with no additional comments or explanations, based upon these qualifications: {response}. Name: {name}. Social media links: {links}"
-        cv = send_req_to_llm(prompt).lstrip("```html").rstrip("```")
+        cv = (
+            (await send_req_to_llm(prompt, call_class=CallClass.generate_cv))
+            .lstrip("```html")
+            .rstrip("```")
+        )
     elif mode == "user-cv":
         cv = TEMPLATE.format(
             name=info.get("name", "Jan Kolon Movano"),
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 
-from backend.routes import pages, users
+from backend.routes import metrics, pages, users
 
 api_router = APIRouter()
 api_router.include_router(pages.router)
 api_router.include_router(users.router)
+api_router.include_router(metrics.router)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from backend.llm import get_llm_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/llm_metrics", response_class=JSONResponse)
+async def llm_metrics():
+    return get_llm_metrics()
@@ -1,15 +1,31 @@
 import os
+import time
+from contextlib import aclosing
+from functools import partial
 from pathlib import Path
 from typing import Any, AsyncGenerator
 
-from playwright.async_api import async_playwright
+from playwright.async_api import Browser, async_playwright
 from playwright_stealth import Stealth
 from sqlmodel import Session
 
-from backend.database.models import UserModel
+from backend.config import settings
+from backend.database.crud import update_automation_steps
+from backend.database.models import UserModel, WebsiteModel
+from backend.llm.telemetry import collect_llm_calls, llm_telemetry
 from backend.logging import get_logger
 from backend.pdf import create_cv
 from backend.scrapers.llm_scraper import LLMScraper
+from backend.scrapers.orchestrator import merge_concurrently
+from backend.scrapers.page_cache import install_mutation_counter, page_cache
+from backend.scrapers.page_classifiers import page_classifier
+from backend.scrapers.resource_policy import (
+    collect_resource_stats,
+    get_resource_policy,
+    install_resource_policy,
+)
+from backend.scrapers.selectors import selector_compiler
+from backend.scrapers.waits import collect_wait_stats
 
 logger = get_logger()
 
@@ -22,56 +38,123 @@ async def find_job_entries(
     generate_cv: bool = False,
     use_user_cv: bool = False,
 ) -> AsyncGenerator[str, Any]:
+    # Websites are scraped in tasks started below, which inherit these
+    run_telemetry = collect_llm_calls()
+    wait_stats = collect_wait_stats()
+    resource_stats = collect_resource_stats()
     async with Stealth().use_async(async_playwright()) as playwright:
         # TODO: Add ability for users to choose their preferred browser, recommend and default to chromium
         browser = await playwright.chromium.launch(headless=False)
-        # TODO: Move code below to the for loop
-        context = await browser.new_context(locale="en-US")
+
+        # Closing the merge cancels all of the websites when the client
+        # disconnects
+        async with aclosing(
+            merge_concurrently(
+                (
+                    partial(
+                        _scrape_website,
+                        browser,
+                        website,
+                        user,
+                        session,
+                        use_user_cv,
+                    )
+                    for website in websites
+                ),
+                settings.SCRAPE_MAX_CONCURRENT_SITES,
+            )
+        ) as messages:
+            async for message in messages:
+                yield message
+
+    logger.info(f"LLM calls by caller: {run_telemetry.summary()}")
+    logger.info(f"Page cache: {page_cache.stats()}")
+    logger.info(f"Compiled selectors: {selector_compiler.stats()}")
+    logger.info(f"Page checks: {page_classifier.stats()}")
+    logger.info(f"Waits: {wait_stats.stats()}")
+    # Blocked requests are never downloaded, so saved bytes are an estimate
+    logger.info(f"Resources (estimated savings): {resource_stats.stats()}")
+    await llm_telemetry.flush()
+
+
+async def _scrape_website(
+    browser: Browser,
+    website: WebsiteModel,
+    user: UserModel,
+    session: Session,
+    use_user_cv: bool,
+) -> AsyncGenerator[str, Any]:
+    logger.info(website)
+    # Every website gets its own context, so cookies, popups and navigation
+    # of one board never get in the way of another
+    context = await browser.new_context(locale="en-US")
+    scraper = None
+    try:
+        await install_mutation_counter(context)
+        if settings.BLOCK_RESOURCES:
+            await install_resource_policy(
+                context, get_resource_policy(website.url)
+            )
         # context.add_cookies()
         page = await context.new_page()
 
-        for website in websites:
-            logger.info(website)
-            scraper = LLMScraper(
-                url=website.url,
-                email=website.user_email,
-                password=website.user_password,
-                context=context,
-                page=page,
-                website_info=website,
-            )
-            await scraper.login_to_page()
+        scraper = LLMScraper(
+            url=website.url,
+            email=website.user_email,
+            password=website.user_password,
+            context=context,
+            page=page,
+            website_info=website,
+        )
+        login_start = time.perf_counter()
+        await scraper.login_to_page()
+        logger.info(
+            f"Logged in to {website.url} in {time.perf_counter() - login_start:.1f}s"
+        )
 
-            running = True
-            while running:
-                for job in await scraper.get_job_entries():
-                    job_data = await scraper.process_and_evaluate_job(job)
-                    if job_data:
-                        if not use_user_cv:
-                            cv = create_cv(
-                                user=user,
-                                job_entry=job_data,
-                                mode="llm-selection",
-                            )
-                        else:
-                            path = os.getenv("USER_CV", "")
-                            if not path:
-                                logger.error(
-                                    "USER_CV variable with path to user's cv is not set"
-                                )
-                                yield f"data:{job_data}\n\n"
-                            cv = Path(path)
-                        logger.info(cv)
-                    # TODO: Create CV in here and then apply ;)
-                    if job_data:
-                        logger.error("Sending data to client")
-                        yield f"data:{job_data.model_dump_json()}\n\n"
+        running = True
+        while running:
+            async for job_data in scraper.process_and_evaluate_jobs(
+                await scraper.get_job_entries(),
+                user_profile=user.model_dump_json(exclude={"id"}),
+            ):
+                if job_data:
+                    if not use_user_cv:
+                        cv = await create_cv(
+                            user=user,
+                            job_entry=job_data,
+                            mode="llm-selection",
+                        )
                     else:
-                        logger.error("Sending just nothing to client")
-                        yield "data:null\n\n"
-                running = await scraper.navigate_to_next_page()
-                logger.info(f"Running: {running}")
-                running = False
+                        path = os.getenv("USER_CV", "")
+                        if not path:
+                            logger.error(
+                                "USER_CV variable with path to user's cv is not set"
+                            )
+                            yield f"data:{job_data}\n\n"
+                        cv = Path(path)
+                    logger.info(cv)
+                # TODO: Create CV in here and then apply ;)
+                if job_data:
+                    logger.error("Sending data to client")
+                    yield f"data:{job_data.model_dump_json()}\n\n"
+                else:
+                    logger.error("Sending just nothing to client")
+                    yield "data:null\n\n"
+            running = await scraper.navigate_to_next_page()
+            logger.info(f"Running: {running}")
+            running = False
+
+        logger.info(f"Automation steps: {scraper.steps.stats()}")
+        logger.info(f"Job page pool: {scraper.job_pages.stats()}")
+        if scraper.steps.changed:
+            update_automation_steps(
+                session, website, scraper.steps.automation_steps
+            )
+    finally:
+        if scraper is not None:
+            await scraper.job_pages.close()
+        await context.close()
 
 
 __all__ = ["find_job_entries"]
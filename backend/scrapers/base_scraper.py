@@ -1,10 +1,23 @@
 import abc
+import asyncio
+from typing import AsyncGenerator, Sequence
 
 from playwright.async_api import BrowserContext, Locator, Page
 
-from backend.database.models import JobEntry, WebsiteModel
+from backend.config import settings
+from backend.database.models import (
+    JobEntry,
+    JobEvaluation,
+    JobEvaluations,
+    WebsiteModel,
+)
 from backend.llm import send_req_to_llm
+from backend.llm.decisions import send_decision_req_to_llm
+from backend.llm.rate_limit import Priority
+from backend.llm.routing import CallClass
 from backend.logging import get_logger
+from backend.scrapers.page_pool import PagePool
+from backend.scrapers.replay import StepReplay
 
 logger = get_logger()
 
@@ -27,6 +40,10 @@ class BaseScraper(abc.ABC):
         self.context = context
         self.page = page
         self.website_info = website_info if website_info else WebsiteModel()
+        self.steps = StepReplay(self.website_info.automation_steps)
+        self.job_pages = PagePool(context, settings.JOB_PAGE_POOL_SIZE)
+        self.typing_profile = self.steps.automation_steps.typing_profile
+        self.clean_logins = self.steps.automation_steps.clean_logins
 
     @abc.abstractmethod
     async def login_to_page(self) -> None:
@@ -56,9 +73,7 @@ class BaseScraper(abc.ABC):
     async def _get_job_information(self, url: str) -> JobEntry | None:
         pass
 
-    async def process_and_evaluate_job(
-        self, locator: Locator
-    ) -> JobEntry | None:
+    async def _get_job_entry(self, locator: Locator) -> JobEntry | None:
         url_2 = await locator.get_attribute("href")
         url = await locator.get_attribute(
             "href"
@@ -73,14 +88,97 @@ class BaseScraper(abc.ABC):
             return None
 
         logger.info(f"job_entry: {job_entry.model_dump_json()}")
+        return job_entry
+
+    async def process_and_evaluate_jobs(
+        self,
+        locators: Sequence[Locator],
+        user_profile: str = "",
+        batch_size: int | None = None,
+    ) -> AsyncGenerator[JobEntry | None, None]:
+        batch_size = batch_size or settings.JOB_EVALUATION_BATCH_SIZE
+        for start in range(0, len(locators), batch_size):
+            # Offers are fetched in parallel, as many at once as there are
+            # pooled tabs
+            results = await asyncio.gather(
+                *(
+                    self._get_job_entry(locator)
+                    for locator in locators[start : start + batch_size]
+                ),
+                return_exceptions=True,
+            )
+            job_entries = []
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Could not get job entry: {result!r}")
+                    result = None
+                elif isinstance(result, BaseException):
+                    raise result
+                job_entries.append(result)
+            found_job_entries = [entry for entry in job_entries if entry]
+            evaluations = iter(
+                await self.evaluate_jobs(found_job_entries, user_profile)
+            )
+            for job_entry in job_entries:
+                if job_entry and next(evaluations).verdict:
+                    yield job_entry
+                else:
+                    yield None
+
+    async def evaluate_jobs(
+        self, job_entries: list[JobEntry], user_profile: str = ""
+    ) -> list[JobEvaluation]:
+        if not job_entries:
+            return []
 
         # TODO: Get user needs
-        user_needs = ""
-        prompt = f"Compare user qualifications and needs: {user_needs}. With these from job offer: {job_entry.model_dump_json()}. Return only one word, True if I should apply, and False if not and no other words/characters"
-        response = await send_req_to_llm(prompt, use_openai=True)
-        logger.info(f"LLM evaluation: {response}")
-
-        if "True" in response:
-            return job_entry
-        else:
-            return None
+        offers = "\n".join(
+            f"{index}: {job_entry.model_dump_json()}"
+            for index, job_entry in enumerate(job_entries)
+        )
+        prompt = f"Compare user qualifications and needs: {user_profile}. With these numbered job offers:\n{offers}\nFor every job offer return its index, verdict: true if the user should apply and false if not, and score from 0 to 100 that tells how well the job offer suits the user"
+        try:
+            response = await send_req_to_llm(
+                prompt,
+                use_openai=True,
+                use_json_schema=True,
+                model=JobEvaluations,
+                priority=Priority.extraction,
+                call_class=CallClass.classify,
+            )
+        except Exception as e:
+            logger.exception(e)
+            response = None
+
+        evaluations = {}
+        if isinstance(response, JobEvaluations):
+            evaluations = {
+                evaluation.index: evaluation
+                for evaluation in response.evaluations
+                if 0 <= evaluation.index < len(job_entries)
+            }
+        logger.info(f"LLM batch evaluation: {evaluations}")
+
+        missing = [i for i in range(len(job_entries)) if i not in evaluations]
+        if missing:
+            logger.error(
+                f"Batch evaluation did not return jobs: {missing}, evaluating them one by one"
+            )
+        for index in missing:
+            evaluations[index] = await self._evaluate_job(
+                job_entries[index], user_profile, index
+            )
+        return [evaluations[i] for i in range(len(job_entries))]
+
+    async def _evaluate_job(
+        self, job_entry: JobEntry, user_profile: str, index: int = 0
+    ) -> JobEvaluation:
+        prompt = f"Compare user qualifications and needs: {user_profile}. With these from job offer: {job_entry.model_dump_json()}. Return only one word, True if I should apply, and False if not and no other words/characters"
+        verdict = await send_decision_req_to_llm(
+            prompt, priority=Priority.extraction
+        )
+        logger.info(f"LLM evaluation: {verdict}")
+
+        return JobEvaluation(
+            index=index, verdict=verdict, score=100 if verdict else 0
+        )
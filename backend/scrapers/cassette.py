@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from playwright.async_api import BrowserContext
+
+from backend.llm.cassette import CassetteMode
+from backend.logging import get_logger
+
+logger = get_logger()
+
+
+async def use_browser_cassette(
+    context: BrowserContext, path: Path, mode: CassetteMode
+) -> None:
+    if mode == CassetteMode.record:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # HAR file is written when the context gets closed
+        await context.route_from_har(
+            path, update=True, update_content="embed", update_mode="full"
+        )
+        logger.info(f"Recording browser traffic to {path}")
+    else:
+        # Requests that were not recorded are aborted, so nothing leaves
+        # the machine during replay
+        await context.route_from_har(path, not_found="abort")
+        logger.info(f"Replaying browser traffic from {path}")
@@ -0,0 +1,110 @@
+import json
+from typing import Iterator, TypeVar
+
+import lxml.html
+from lxml import etree
+
+from backend.llm.tokens import count_tokens
+
+T = TypeVar("T")
+
+
+def fits_in_tokens(content: str, max_tokens: int) -> bool:
+    # Every token has at least one character, so short content needs no
+    # tokenizing at all
+    return len(content) <= max_tokens or count_tokens(content) <= max_tokens
+
+
+def split_into_chunks(
+    content: str, max_tokens: int, is_snapshot: bool = False
+) -> list[str]:
+    if fits_in_tokens(content, max_tokens):
+        return [content]
+    if is_snapshot:
+        return _split_snapshot(content, max_tokens)
+    return _split_html(content, max_tokens)
+
+
+def _dumps(value: dict) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _pack(parts: Iterator[tuple[T, int]], max_tokens: int) -> list[list[T]]:
+    chunks: list[list[T]] = []
+    chunk: list[T] = []
+    chunk_tokens = 0
+    for part, tokens in parts:
+        if chunk and chunk_tokens + tokens > max_tokens:
+            chunks.append(chunk)
+            chunk, chunk_tokens = [], 0
+        chunk.append(part)
+        chunk_tokens += tokens
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _split_snapshot(content: str, max_tokens: int) -> list[str]:
+    snapshot = json.loads(content)
+    # Elements are kept whole, every chunk is a valid outline of its own
+    return [
+        _dumps({"url": snapshot.get("url"), "elements": chunk})
+        for chunk in _pack(
+            (
+                (element, count_tokens(_dumps(element)))
+                for element in snapshot["elements"]
+            ),
+            max_tokens,
+        )
+    ]
+
+
+def _split_html(content: str, max_tokens: int) -> list[str]:
+    root = lxml.html.document_fromstring(content)
+    body = root.find("body")
+    return [
+        "".join(chunk)
+        for chunk in _pack(
+            _split_element(body if body is not None else root, max_tokens),
+            max_tokens,
+        )
+    ]
+
+
+def _split_element(
+    element: etree._Element, max_tokens: int
+) -> Iterator[tuple[str, int]]:
+    # Elements that fit are never cut, bigger ones are split into children, so
+    # job tiles, forms and lists stay in one piece as long as possible
+    html = lxml.html.tostring(element, encoding="unicode", with_tail=False)
+    tokens = count_tokens(html)
+    if tokens <= max_tokens:
+        yield html, tokens
+    elif len(element):
+        if element.text and element.text.strip():
+            yield from _split_text(element.text, max_tokens)
+        for child in element:
+            yield from _split_element(child, max_tokens)
+    else:
+        yield from _split_text(element.text_content(), max_tokens)
+
+    if element.tail and element.tail.strip():
+        yield from _split_text(element.tail, max_tokens)
+
+
+def _split_text(text: str, max_tokens: int) -> Iterator[tuple[str, int]]:
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        yield text, tokens
+        return
+    size = max(1, len(text) * max_tokens // tokens)
+    start = 0
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            # Words are not cut in half if there is a space to cut at
+            space = text.rfind(" ", start + 1, end)
+            if space > start:
+                end = space
+        yield from _split_text(text[start:end], max_tokens)
+        start = end
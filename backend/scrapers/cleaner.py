@@ -0,0 +1,46 @@
+import lxml.html
+from lxml import etree
+
+# Tags that carry no information useful for the LLM, only tokens
+REMOVED_TAGS = (
+    "head",
+    "meta",
+    "style",
+    "script",
+    "noscript",
+    "template",
+    "iframe",
+    "video",
+    "audio",
+    "map",
+    "area",
+    "embed",
+    "object",
+    "applet",
+    "track",
+    "canvas",
+    "svg",
+    "img",
+    "picture",
+    "source",
+    etree.Comment,
+)
+
+
+def clean_html(html: str, body_only: bool = False) -> str:
+    if not html.strip():
+        return ""
+    try:
+        root = lxml.html.document_fromstring(html)
+    except etree.ParserError:
+        return ""
+
+    # One walk over the tree removes all of them, text that follows a removed
+    # element belongs to its parent, so it is kept
+    etree.strip_elements(root, *REMOVED_TAGS, with_tail=False)
+
+    if body_only:
+        body = root.find("body")
+        if body is not None:
+            root = body
+    return lxml.html.tostring(root, encoding="unicode")
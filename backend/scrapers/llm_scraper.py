@@ -1,12 +1,33 @@
 import asyncio
 import datetime
-import json
 
-from playwright.async_api import Locator, Page, TimeoutError
+from playwright.async_api import Locator, TimeoutError
 
-from backend.llm import send_req_to_llm
+from backend.config import settings
+from backend.database.models import (
+    AttributeType,
+    JobEntry,
+    JobInformation,
+    Step,
+    StepAction,
+)
+from backend.llm.decisions import send_decision_req_to_llm
+from backend.llm.rate_limit import Priority
+from backend.llm.structured import send_structured_req_to_llm
 from backend.logging import get_logger
-from backend.scrapers.base_scraper import BaseScraper, JobEntry
+from backend.scrapers.base_scraper import BaseScraper
+from backend.scrapers.page_classifiers import (
+    PageType,
+    has_popup,
+    page_classifier,
+)
+from backend.scrapers.probing import get_element_selectors
+from backend.scrapers.replay import build_step
+from backend.scrapers.selectors import get_site, selector_compiler
+from backend.scrapers.typing_profiles import (
+    detect_bot_check,
+    update_typing_profile,
+)
 from backend.scrapers.utils import (
     click,
     fill,
@@ -15,6 +36,7 @@ from backend.scrapers.utils import (
     get_page_content,
     goto,
 )
+from backend.scrapers.waits import wait_for_settle
 
 logger = get_logger()
 
@@ -30,51 +52,203 @@ class LLMScraper(BaseScraper):
         await self._pass_cookies_popup()
         await self._navigate_to_login_page()
 
-        email_field_locator, _, _ = await find_html_element(
-            self.page, "Find input field for username/email."
+        email = await self._perform_step(
+            "login_to_page",
+            "email",
+            "Find input field for username/email.",
+            StepAction.fill,
+            {"field": "email"},
         )
-        await fill(email_field_locator, self.email)
 
-        password_field_locator, _, _ = await find_html_element(
-            self.page, "Find input field for password."
-        )
-        if not password_field_locator:
-            sign_in_btn_locator, _, _ = await find_html_element(
-                self.page, "Find button that moves to next part of login page."
+        # Known two-step logins go straight to the next part of the page
+        password = None
+        if not self.steps.get_step("login_to_page", "next"):
+            password = await self._perform_step(
+                "login_to_page",
+                "password",
+                "Find input field for password.",
+                StepAction.fill,
+                {"field": "password"},
             )
-            await click(sign_in_btn_locator, self.page)
-
-            password_field_locator, _, _ = await find_html_element(
-                self.page, "Find input field for password."
+        if password is None:
+            await self._perform_step(
+                "login_to_page",
+                "next",
+                "Find button that moves to next part of login page.",
+                StepAction.click,
+            )
+            password = await self._perform_step(
+                "login_to_page",
+                "password",
+                "Find input field for password.",
+                StepAction.fill,
+                {"field": "password"},
             )
-        await fill(password_field_locator, self.password)
 
-        sign_in_btn_locator, _, _ = await find_html_element(
-            self.page,
+        sign_in = await self._perform_step(
+            "login_to_page",
+            "sign_in",
             "Find the sign in/login button or button that moves to next part of login page.",
+            StepAction.click,
             additional_llm=True,
         )
-        await click(sign_in_btn_locator, self.page)
+        await self._check_login(
+            submitted=all(
+                element is not None for element in (email, password, sign_in)
+            )
+        )
+
+    async def _check_login(self, submitted: bool) -> None:
+        bot_check = await detect_bot_check(self.page)
+        signals = await page_classifier.get_signals(self.page)
+        # Login form disappears once the login went through, a form that was
+        # never filled in proves nothing about the typing profile
+        logged_in = (
+            submitted and bool(signals) and not signals.get("passwordInputs")
+        )
+        logger.info(
+            f"Login with {self.typing_profile} typing: {logged_in=}, {bot_check=}"
+        )
+        self.typing_profile, self.clean_logins = update_typing_profile(
+            self.typing_profile, self.clean_logins, bot_check, logged_in
+        )
+        # Saved together with the steps of the website
+        steps = self.steps.automation_steps
+        if (steps.typing_profile, steps.clean_logins) != (
+            self.typing_profile,
+            self.clean_logins,
+        ):
+            steps.typing_profile = self.typing_profile
+            steps.clean_logins = self.clean_logins
+            self.steps.changed = True
+
+    async def _perform_step(
+        self,
+        group: str,
+        name: str,
+        prompt: str,
+        action: StepAction,
+        arguments: dict | None = None,
+        additional_llm: bool = False,
+    ) -> Locator | None:
+        step = self.steps.get_step(group, name)
+        if step:
+            element = await self._replay_step(step)
+            if element:
+                return element
+            logger.info(
+                f"No recorded selector of {group}.{name} works, asking LLM"
+            )
+
+        element, attribute, attribute_type = await find_html_element(
+            self.page, prompt, additional_llm=additional_llm
+        )
+        step = await self._build_step(
+            name, action, element, attribute, attribute_type, arguments
+        )
+        if not await self._run_action(action, element, arguments):
+            return None
+        if step:
+            self.steps.record_step(group, step)
+        return element
+
+    async def _replay_step(self, step: Step) -> Locator | None:
+        # Selectors are tried from the most to the least reliable one, the LLM
+        # is only needed when none of them works anymore
+        best = self.steps.ranked_selectors(step)[0]
+        for selector, element in await self.steps.locate(self.page, step):
+            # Broken selectors give way to the next one quickly, the LLM
+            # finds the element if none of them works
+            if await self._run_action(
+                step.action,
+                element,
+                step.arguments,
+                retry=1,
+                timeout=settings.REPLAY_ACTION_TIMEOUT,
+            ):
+                self.steps.mark(step, selector, True)
+                self.steps.replayed += 1
+                if selector is not best:
+                    self.steps.healed += 1
+                    logger.info(f"Step {step.name} healed with {selector}")
+                return element
+            self.steps.mark(step, selector, False)
+        return None
+
+    async def _replay_steps(self, group: str) -> bool:
+        steps = self.steps.get_steps(group)
+        if not steps:
+            return False
+        for index, step in enumerate(steps):
+            if not await self._replay_step(step):
+                logger.info(f"Replay of {group} failed at step: {step.name}")
+                # Steps before the broken one still work, only the rest of the
+                # way is found again
+                self.steps.truncate(group, index)
+                return False
+        logger.info(f"Replayed {len(steps)} steps of {group}")
+        return True
+
+    async def _run_action(
+        self,
+        action: StepAction,
+        element: Locator | None,
+        arguments: dict | None,
+        retry: int = 3,
+        timeout: float | None = None,
+    ) -> bool:
+        if action == StepAction.click:
+            return await click(element, self.page, retry, timeout)
+        if action == StepAction.fill:
+            # Only the name of the field is saved, never the credentials
+            return await fill(
+                element,
+                getattr(self, arguments["field"]),
+                retry,
+                self.typing_profile,
+                timeout,
+            )
+        return element is not None
+
+    async def _build_step(
+        self,
+        name: str,
+        action: StepAction,
+        element: Locator | None,
+        attribute: str | None,
+        attribute_type: AttributeType | None,
+        arguments: dict | None = None,
+    ) -> Step | None:
+        if not element or not attribute or not attribute_type:
+            return None
+        # Alternatives are collected before the action, which can remove the
+        # element from the page
+        return build_step(
+            name,
+            action,
+            attribute,
+            attribute_type,
+            arguments,
+            await get_element_selectors(element),
+        )
 
     async def _is_on_login_page(self) -> bool:
+        return await page_classifier.is_page(
+            self.page, PageType.login, self._ask_llm_if_login_page
+        )
+
+    async def _ask_llm_if_login_page(self) -> bool:
         url = self.page.url
-        # if (
-        #     "login" in url
-        #     or "signin" in url
-        #     or "sign-in" in url
-        #     or "sign_in" in url
-        # ):
-        #     return True
-
-        if "True" in await send_req_to_llm(
+        if await send_decision_req_to_llm(
             f"Determine if this site is a login page based upon its source code and url, it should contain input field for user's email, sometimes login page contains password field too, return only True or False. url: {url}\npage: {await get_page_content(self.page)}",
-            use_openai=True,
         ):
             return True
 
         return False
 
     async def _navigate_to_login_page(self) -> None:
+        if await self._replay_steps("navigate_to_login_page"):
+            return
         retry = 0
         attribute_list = []
 
@@ -84,12 +258,20 @@ class LLMScraper(BaseScraper):
             else:
                 prompt = f"Find a button/link that opens login page for a job candidate, where user logins using email and password or menu that lets user open login page. Those are elements that were used in a previous steps, do not use them again: {attribute_list}"
 
-            btn, attributes, _ = await find_html_element(
+            btn, attributes, attribute_type = await find_html_element(
                 page=self.page, prompt=prompt
             )
             attribute_list.append(attributes)
 
-            await click(btn, self.page)
+            step = await self._build_step(
+                str(len(self.steps.get_steps("navigate_to_login_page"))),
+                StepAction.click,
+                btn,
+                attributes,
+                attribute_type,
+            )
+            if await click(btn, self.page) and step:
+                self.steps.record_step("navigate_to_login_page", step)
             retry += 1
 
         if retry >= 5:
@@ -100,46 +282,37 @@ class LLMScraper(BaseScraper):
         retry = 0
         passed = False
         while not passed and retry < 5:
-            btn, attribute, attribute_type = await find_html_element(
-                self.page,
-                "Find button that accepts cookies or closes the cookie consent banner. If multiple buttons exist, choose the one that makes the popup disappear",
+            passed = (
+                await self._perform_step(
+                    "pass_cookies_popup",
+                    "accept",
+                    "Find button that accepts cookies or closes the cookie consent banner. If multiple buttons exist, choose the one that makes the popup disappear",
+                    StepAction.click,
+                )
+                is not None
             )
-            passed = await click(btn, self.page)
             retry += 1
-
-        # cookies_steps = self.website_info.automation_steps.pass_cookies_popup
         # TODO: Try using cookies to avoid popups
-        # if cookies_steps:
-        #     btn = await get_locator(self.page, cookies_steps[0])
-        #     if await click(btn, self.page):
-        #         return
-        # btn, attribute, attribute_type = await find_html_element(
-        #     self.page,
-        #     "Find button responsible for accepting website cookies",
-        # )
-        # await click(btn, self.page)
-        #
-        # step = Step(
-        #     action=click,
-        #     html_element_attribute=attribute,
-        #     attribute_type=attribute_type,
-        #     arguments={},
-        # )
-        #
-        # self.website_info.automation_steps.pass_cookies_popup = [step]
 
     async def _remove_any_popup(self) -> None:
+        # LLM is asked only while a popup is visible, a recorded close button
+        # is clicked without it
         retry = 0
-        passed = False
-        while not passed and retry < 5:
-            btn, attribute, attribute_type = await find_html_element(
-                self.page,
+        while retry < 5 and await has_popup(self.page):
+            await self._perform_step(
+                "remove_popup",
+                "close",
                 "Find button that closes the popup banner. If multiple buttons exist, choose the one that makes the popup disappear",
+                StepAction.click,
             )
-            passed = await click(btn, self.page)
             retry += 1
 
     async def _is_on_job_list_page(self) -> bool:
+        return await page_classifier.is_page(
+            self.page, PageType.job_list, self._ask_llm_if_job_list_page
+        )
+
+    async def _ask_llm_if_job_list_page(self) -> bool:
         url = self.page.url
         prompt = f"""
         You are analyzing a web page to determine whether it is strictly a job listing page.
@@ -158,10 +331,9 @@ class LLMScraper(BaseScraper):
         URL: {url}
         Page content: {await get_page_content(self.page)}
         """
-        if "True" in await send_req_to_llm(
+        if await send_decision_req_to_llm(
             prompt=prompt,
             # f"Determine if this site is a job listing page, return only True or False. Consider it a job listing page if the content or url suggests: a list of open positions. Based upon url: {url} and page content: {await get_page_content(self.page)}",
-            use_openai=True,
         ):
             logger.info("LLM thinks we are on job listing page")
             return True
@@ -171,6 +343,8 @@ class LLMScraper(BaseScraper):
 
     async def _navigate_to_job_list_page(self) -> None:
         logger.info("Navigating to job listing page")
+        if await self._replay_steps("navigate_to_job_list"):
+            return
         retry = 0
         attribute_list = []
 
@@ -183,12 +357,20 @@ class LLMScraper(BaseScraper):
             else:
                 prompt = f"Find button/link that opens job listing page or menu that lets user open job listing page. Those are elements that were used in a previous steps, do not use them again: {attribute_list}"
 
-            btn, attributes, _ = await find_html_element(
+            btn, attributes, attribute_type = await find_html_element(
                 page=self.page, prompt=prompt
             )
             attribute_list.append(attributes)
 
-            await click(btn, self.page)
+            step = await self._build_step(
+                str(len(self.steps.get_steps("navigate_to_job_list"))),
+                StepAction.click,
+                btn,
+                attributes,
+                attribute_type,
+            )
+            if await click(btn, self.page) and step:
+                self.steps.record_step("navigate_to_job_list", step)
             retry += 1
 
         if retry >= 5:
@@ -201,9 +383,11 @@ class LLMScraper(BaseScraper):
 
         await self._navigate_to_job_list_page()
 
-        bottom_element, _, _ = await find_html_element(
-            self.page,
+        bottom_element = await self._perform_step(
+            "get_job_entries",
+            "bottom",
             "Find a footer of a website, if there is no footer find an element that is at the bottom of the page, so once in view port it loads all of the page content",
+            StepAction.locate,
         )
 
         if bottom_element:
@@ -212,6 +396,8 @@ class LLMScraper(BaseScraper):
                 logger.info(
                     "Scrolling to element using scroll_into_view_if_needed method"
                 )
+                # Lazy loaded entries show up after scrolling
+                await wait_for_settle(self.page)
             except TimeoutError:
                 retry = 0
                 while not await bottom_element.is_visible() and retry < 100:
@@ -251,23 +437,53 @@ class LLMScraper(BaseScraper):
             - Does NOT link to saving, sharing, applying, or company info.
         """
         # prompt = "Find an element that is responsible for holding job offer tile",
-        attributes = await find_html_element_attributes(
-            page=self.page,
-            prompt=prompt,
+        step = self.steps.get_step("get_job_entries", "job_links")
+        # Job links are a list, so every match of the selector is wanted
+        found = (
+            await self.steps.locate(self.page, step, unique=False)
+            if step
+            else []
         )
-        if not attributes:
-            logger.exception(
-                "Cannot find attributes that would enable scraper to find job entries"
+        if found:
+            selector, _ = found[0]
+            self.steps.mark(step, selector, True)
+            self.steps.replayed += 1
+            class_selector = selector.html_element_attribute
+        else:
+            attributes = await find_html_element_attributes(
+                page=self.page,
+                prompt=prompt,
             )
-            return tuple()
+            if not attributes:
+                logger.exception(
+                    "Cannot find attributes that would enable scraper to find job entries"
+                )
+                return tuple()
 
-        class_list = attributes.get("classList", [])
-        if not class_list:
-            logger.error("Did not find class_list for selecting job tiles")
-            return tuple()
+            class_list = attributes.get("classList", [])
+            class_selector = (
+                selector_compiler.compile_classes(
+                    class_list, get_site(self.page.url)
+                )
+                if class_list and isinstance(class_list, list)
+                else None
+            )
+            if not class_selector:
+                logger.error("Did not find class_list for selecting job tiles")
+                return tuple()
+            # Selects all of the job tiles, so there are no alternatives of a
+            # single element to collect
+            self.steps.record_step(
+                "get_job_entries",
+                build_step(
+                    "job_links",
+                    StepAction.locate,
+                    class_selector,
+                    AttributeType.class_l,
+                ),
+            )
         logger.info("We are going to select job tiles")
 
-        class_selector = f".{'.'.join(class_list)}"
         logger.info(f"{class_selector=}")
         locator = self.page.locator(class_selector)
 
@@ -276,10 +492,10 @@ class LLMScraper(BaseScraper):
         ]
         # TODO: Add check for None inside of job_entry_links
         logger.info(
-            f"Do those classes CSS classes: {class_list} select only job offers and no other elements. Return 'True' if only jobs are selected and 'False' if {class_list} CSS classes select also other elements. {'\n'.join(job_entry_links)}"
+            f"Do those classes CSS classes: {class_selector} select only job offers and no other elements. Return 'True' if only jobs are selected and 'False' if {class_selector} CSS classes select also other elements. {'\n'.join(job_entry_links)}"
         )
         # response = await send_req_to_llm(
-        #     f"Do those classes CSS classes: {class_list} select only job offers and no other elements. Return 'True' if only jobs are selected and 'False' if {class_list} CSS classes select also other elements. {'\n'.join(await locator.all_inner_texts())}",
+        #     f"Do those classes CSS classes: {class_selector} select only job offers and no other elements. Return 'True' if only jobs are selected and 'False' if {class_selector} CSS classes select also other elements. {'\n'.join(await locator.all_inner_texts())}",
         #     use_openai=True,
         # )
         # if "True" in response:
@@ -287,25 +503,25 @@ class LLMScraper(BaseScraper):
         jobs_2 = set(await locator.and_(self.page.get_by_role("link")).all())
         jobs3 = set(await locator.get_by_role("link").all())
         logger.info(
-            f"Amount of elements selected by {class_list} CSS classes: {len(jobs)} and second version: {len(jobs_2)}, and third version: {len(jobs3)}"
+            f"Amount of elements selected by {class_selector} CSS classes: {len(jobs)} and second version: {len(jobs_2)}, and third version: {len(jobs3)}"
         )
         return tuple(jobs)
 
-        logger.error(f"{class_list} don't select only job entries")
+        logger.error(f"{class_selector} don't select only job entries")
         logger.error(
-            f"Amount of elements selected by {class_list} CSS classes: {len(await locator.all())}"
+            f"Amount of elements selected by {class_selector} CSS classes: {len(await locator.all())}"
         )
         return tuple()
 
     async def navigate_to_next_page(self) -> bool:
-        btn, _, _ = await find_html_element(
-            self.page,
+        if not await self._perform_step(
+            "navigate_to_next_page",
+            "next",
             "Find button that is responsible for moving to next job listing page",
-        )
-        if not btn:
+            StepAction.click,
+        ):
             logger.info("Could not find next page button")
             return False
-        await click(btn, self.page)
         return True
 
     async def _go_to_next_job(self) -> bool:
@@ -315,49 +531,22 @@ class LLMScraper(BaseScraper):
         pass
 
     async def _get_job_information(self, link: str) -> None | JobEntry:
-        job_page: Page = await self.context.new_page()
-        await goto(job_page, link)
-
-        # response = await send_req_to_llm(
-        #     f"Get job information like title, company_name, requirements, duties, about_project, offer_benefits, location, contract_type, employment_type, work_arrangement, additional_information. Do not explain, only return JSON\n{await get_page_content(job_page)}",
-        #     use_openai=True,
-        # )
-        # response = None
-        # try:
-        #     response = await send_req_to_llm(
-        #         prompt=f"Retrieve all information about this job offer from this page: {await get_page_content(job_page)}",
-        #         use_openai=True,
-        #         use_json_schema=True,
-        #         model=JobEntry,
-        #     )
-        # except Exception as e:
-        #     logger.exception(e)
-        model_dict = JobEntry.model_json_schema()["properties"]
-        logger.info(type(model_dict))
-        model_dict.pop("discovery_date")
-        model_dict.pop("job_url")
-
-        response = await send_req_to_llm(
-            prompt=f"Retrieve all information about this job offer as a JSON in this schema: {model_dict} from this page: {await get_page_content(job_page)}",
-            use_openai=True,
-        )
-
-        attributes = json.loads(response)
-        attributes["discovery_date"] = datetime.date.today()
-        attributes["job_url"] = link
+        async with self.job_pages.lease() as job_page:
+            await goto(job_page, link)
+            job_information = await send_structured_req_to_llm(
+                prompt=f"Retrieve all information about this job offer from this page: {await get_page_content(job_page)}",
+                model=JobInformation,
+                priority=Priority.extraction,
+            )
 
-        logger.info(f"Something:\n{attributes}")
-        # logger.info(
-        #     f"Job information retrieved by LLM using JSON outputs: {response}"
-        # )
-        await job_page.close()
+        if not job_information:
+            logger.error(f"Could not retrieve job information from: {link}")
+            return None
 
-        try:
-            data = JobEntry.model_validate(attributes)
-            logger.info(
-                f"JobEntry model data: {data.model_dump_json(indent=2)}"
-            )
-            return data
-        except Exception as e:
-            logger.exception(e)
-        return None
+        data = JobEntry(
+            **job_information.model_dump(),
+            discovery_date=datetime.date.today(),
+            job_url=link,
+        )
+        logger.info(f"JobEntry model data: {data.model_dump_json(indent=2)}")
+        return data
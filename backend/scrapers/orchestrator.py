@@ -0,0 +1,44 @@
+import asyncio
+from typing import AsyncGenerator, AsyncIterator, Callable, Iterable, TypeVar
+
+from backend.logging import get_logger
+
+logger = get_logger()
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+async def merge_concurrently(
+    sources: Iterable[Callable[[], AsyncIterator[T]]], max_concurrent: int
+) -> AsyncGenerator[T, None]:
+    # Every source runs in its own task, items are yielded in the order they
+    # arrive, so one slow website does not hold back results of the others
+    queue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run(source: Callable[[], AsyncIterator[T]]) -> None:
+        try:
+            async with semaphore:
+                async for item in source():
+                    await queue.put(item)
+        except Exception:
+            logger.exception("Source failed, continuing with the others")
+        finally:
+            await queue.put(_DONE)
+
+    tasks = [asyncio.create_task(run(source)) for source in sources]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        # Client disconnected or all sources are done
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,89 @@
+from typing import Awaitable, Callable
+from weakref import WeakKeyDictionary
+
+from playwright.async_api import BrowserContext, Error, Page
+
+from backend.logging import get_logger
+
+logger = get_logger()
+
+# Counts DOM changes, so that an unchanged page can be recognized without
+# serializing it. Marker attributes set by snapshots are not counted
+MUTATION_COUNTER_SCRIPT = """
+(() => {
+    if (window.__aaMutations !== undefined) {
+        return;
+    }
+    window.__aaDocument = Math.random().toString(36).slice(2);
+    window.__aaMutations = 0;
+    const observe = () => new MutationObserver((mutations) => {
+        window.__aaMutations += mutations.length;
+    }).observe(document, {
+        childList: true,
+        subtree: true,
+        characterData: true,
+        attributes: true,
+        attributeFilter: ["class", "style", "hidden", "open", "aria-hidden", "disabled", "value"],
+    });
+    if (document.documentElement) {
+        observe();
+    } else {
+        document.addEventListener("readystatechange", observe, {once: true});
+    }
+})()
+"""
+FINGERPRINT_SCRIPT = f"""
+() => {{
+    {MUTATION_COUNTER_SCRIPT};
+    return `${{window.__aaDocument}}:${{window.__aaMutations}}`;
+}}
+"""
+
+
+class PageCache:
+    def __init__(self) -> None:
+        self._pages: WeakKeyDictionary[Page, dict[str, tuple[str, str]]] = (
+            WeakKeyDictionary()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    async def get_fingerprint(self, page: Page) -> str | None:
+        try:
+            document = await page.evaluate(FINGERPRINT_SCRIPT)
+        except Error:
+            # Page is in the middle of navigation
+            return None
+        return f"{page.url}|{document}"
+
+    async def get(
+        self, page: Page, kind: str, load: Callable[[], Awaitable[str]]
+    ) -> str:
+        fingerprint = await self.get_fingerprint(page)
+        entries = self._pages.setdefault(page, {})
+        cached = entries.get(kind)
+        if fingerprint is not None and cached and cached[0] == fingerprint:
+            self.hits += 1
+            logger.debug(f"Page cache hit: {kind}, {fingerprint}")
+            return cached[1]
+
+        self.misses += 1
+        content = await load()
+        # Content is only valid for the fingerprint taken before loading it,
+        # changes made in the meantime will show up as a new fingerprint
+        if fingerprint is not None:
+            entries[kind] = (fingerprint, content)
+        return content
+
+    def invalidate(self, page: Page) -> None:
+        self._pages.pop(page, None)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+async def install_mutation_counter(context: BrowserContext) -> None:
+    await context.add_init_script(MUTATION_COUNTER_SCRIPT)
+
+
+page_cache = PageCache()
@@ -0,0 +1,254 @@
+import re
+from enum import StrEnum
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+
+from playwright.async_api import Error, Page
+
+from backend.config import settings
+from backend.logging import get_logger
+
+logger = get_logger()
+
+LOGIN_URL = re.compile(r"log-?in|sign-?in|sign_in|auth|sso", re.IGNORECASE)
+JOB_LIST_URL = re.compile(
+    r"jobs|careers|vacanc|positions|openings|search|offers", re.IGNORECASE
+)
+# Path segments that change between pages of the same kind, e.g. ids, slugs
+# ending with ids or hashes
+VARIABLE_SEGMENT = re.compile(r"\d|^[0-9a-f]{16,}$", re.IGNORECASE)
+
+# Collects everything the classifiers need in one round-trip
+PAGE_SIGNALS_SCRIPT = """
+() => {
+    const isVisible = (element) => {
+        const box = element.getBoundingClientRect();
+        return box.width > 0 && box.height > 0 && window.getComputedStyle(element).visibility !== "hidden";
+    };
+    const jobLink = /job|career|position|vacanc|opening/i;
+
+    let jobPostings = 0;
+    const countPostings = (value) => {
+        if (Array.isArray(value)) {
+            value.forEach(countPostings);
+        } else if (value && typeof value === "object") {
+            const types = [].concat(value["@type"] || []);
+            if (types.includes("JobPosting")) {
+                jobPostings += 1;
+            }
+            countPostings(value["@graph"]);
+            countPostings(value.itemListElement);
+            countPostings(value.item);
+        }
+    };
+    for (const script of document.querySelectorAll('script[type="application/ld+json"]')) {
+        try {
+            countPostings(JSON.parse(script.textContent));
+        } catch (e) {}
+    }
+    jobPostings += document.querySelectorAll('[itemtype*="schema.org/JobPosting"]').length;
+
+    // Job lists are a group of siblings that look the same and link somewhere
+    let repeatedCards = 0;
+    let jobCards = 0;
+    for (const parent of document.body ? document.body.querySelectorAll("*") : []) {
+        if (parent.children.length < 3) {
+            continue;
+        }
+        const groups = new Map();
+        for (const child of parent.children) {
+            const link = child.matches("a[href]") ? child : child.querySelector("a[href]");
+            if (!link) {
+                continue;
+            }
+            const signature = `${child.tagName}.${Array.from(child.classList).sort().join(".")}`;
+            const group = groups.get(signature) || {cards: 0, jobs: 0};
+            group.cards += 1;
+            if (jobLink.test(link.getAttribute("href"))) {
+                group.jobs += 1;
+            }
+            groups.set(signature, group);
+        }
+        for (const group of groups.values()) {
+            repeatedCards = Math.max(repeatedCards, group.cards);
+            jobCards = Math.max(jobCards, group.jobs);
+        }
+    }
+
+    return {
+        passwordInputs: Array.from(document.querySelectorAll('input[type="password"]')).filter(isVisible).length,
+        emailInputs: Array.from(document.querySelectorAll(
+            'input[type="email"], input[autocomplete="email"], input[autocomplete="username"], ' +
+            'input[name*="email" i], input[name*="user" i], input[name*="login" i], input[id*="email" i]'
+        )).filter(isVisible).length,
+        jobPostings: jobPostings,
+        repeatedCards: repeatedCards,
+        jobCards: jobCards,
+    };
+}
+"""
+
+# Modals and overlays that cover a large part of the viewport, most pages have
+# none, so closing popups does not need the LLM there
+POPUP_SCRIPT = """
+() => {
+    const isVisible = (element) => {
+        const box = element.getBoundingClientRect();
+        const style = window.getComputedStyle(element);
+        return box.width > 0 && box.height > 0 && style.visibility !== "hidden" && style.display !== "none";
+    };
+    const dialogs = document.querySelectorAll('dialog[open], [role="dialog"], [role="alertdialog"], [aria-modal="true"]');
+    if (Array.from(dialogs).some(isVisible)) {
+        return true;
+    }
+    const viewport = window.innerWidth * window.innerHeight;
+    for (const element of document.body ? document.body.querySelectorAll("*") : []) {
+        if (window.getComputedStyle(element).position !== "fixed" || !isVisible(element)) {
+            continue;
+        }
+        const box = element.getBoundingClientRect();
+        const width = Math.min(box.right, window.innerWidth) - Math.max(box.left, 0);
+        const height = Math.min(box.bottom, window.innerHeight) - Math.max(box.top, 0);
+        if (width > 0 && height > 0 && width * height >= viewport * 0.3) {
+            return true;
+        }
+    }
+    return false;
+}
+"""
+
+
+async def has_popup(page: Page) -> bool:
+    try:
+        return await page.evaluate(POPUP_SCRIPT)
+    except Error as e:
+        # Page is in the middle of navigation, the LLM decides
+        logger.error(f"Could not look for popups: {e}")
+        return True
+
+
+class PageType(StrEnum):
+    login = "login"
+    job_list = "job_list"
+
+
+class PageCheck:
+    def __init__(self, is_page: bool, confidence: float, reason: str) -> None:
+        self.is_page = is_page
+        self.confidence = confidence
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return f"{self.is_page} ({self.confidence}): {self.reason}"
+
+
+def get_url_template(url: str) -> str:
+    parts = urlsplit(url)
+    path = "/".join(
+        "*" if VARIABLE_SEGMENT.search(segment) else segment
+        for segment in parts.path.rstrip("/").split("/")
+    )
+    return f"{parts.netloc}{path}"
+
+
+def classify_login_page(url: str, signals: dict) -> PageCheck:
+    if signals.get("passwordInputs"):
+        return PageCheck(True, 0.95, "visible password input")
+    has_email = bool(signals.get("emailInputs"))
+    login_url = bool(LOGIN_URL.search(urlsplit(url).path))
+    if has_email and login_url:
+        return PageCheck(True, 0.9, "email input on a login url")
+    if not has_email:
+        return PageCheck(False, 0.9, "no email or password input")
+    return PageCheck(True, 0.5, "email input only")
+
+
+def classify_job_list_page(url: str, signals: dict) -> PageCheck:
+    job_postings = signals.get("jobPostings", 0)
+    job_cards = signals.get("jobCards", 0)
+    if job_postings >= 2:
+        return PageCheck(True, 0.95, f"{job_postings} JobPosting items")
+    if job_postings == 1 and job_cards < 3:
+        return PageCheck(False, 0.85, "single JobPosting")
+    if signals.get("passwordInputs"):
+        return PageCheck(False, 0.9, "visible password input")
+    if job_cards >= 3:
+        job_url = bool(JOB_LIST_URL.search(url))
+        return PageCheck(
+            True, 0.95 if job_url else 0.85, f"{job_cards} repeated job cards"
+        )
+    if signals.get("repeatedCards", 0) < 3:
+        # Tiles of SPAs are often not links and lazy lists are not loaded yet,
+        # so the LLM decides
+        return PageCheck(False, 0.6, "no repeated cards")
+    return PageCheck(False, 0.4, "repeated cards without job links")
+
+
+CLASSIFIERS: dict[PageType, Callable[[str, dict], PageCheck]] = {
+    PageType.login: classify_login_page,
+    PageType.job_list: classify_job_list_page,
+}
+
+
+class PageClassifier:
+    def __init__(self) -> None:
+        self._decisions: dict[tuple, bool] = {}
+        self.heuristic = 0
+        self.memoized = 0
+        self.llm = 0
+
+    async def get_signals(self, page: Page) -> dict:
+        try:
+            return await page.evaluate(PAGE_SIGNALS_SCRIPT)
+        except Error as e:
+            # Page is in the middle of navigation
+            logger.error(f"Could not collect page signals: {e}")
+            return {}
+
+    async def is_page(
+        self,
+        page: Page,
+        page_type: PageType,
+        ask_llm: Callable[[], Awaitable[bool]],
+    ) -> bool:
+        url = page.url
+        signals = await self.get_signals(page)
+        if not signals:
+            self.llm += 1
+            return await ask_llm()
+
+        # Same kind of url with the same kind of content, e.g. job offers with
+        # different ids, gets the same answer. Whether a login form or cards
+        # are shown is part of the key, so modals and SPAs are not missed
+        key = (
+            page_type,
+            get_url_template(url),
+            bool(signals.get("passwordInputs")),
+            bool(signals.get("emailInputs")),
+            min(signals.get("jobPostings", 0), 2),
+            min(signals.get("jobCards", 0), 3),
+        )
+        if key in self._decisions:
+            self.memoized += 1
+            return self._decisions[key]
+
+        check = CLASSIFIERS[page_type](url, signals)
+        logger.info(f"Page check {page_type} for {url}: {check}")
+        if check.confidence >= settings.PAGE_CLASSIFIER_MIN_CONFIDENCE:
+            self.heuristic += 1
+            answer = check.is_page
+        else:
+            self.llm += 1
+            answer = await ask_llm()
+        self._decisions[key] = answer
+        return answer
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "heuristic": self.heuristic,
+            "memoized": self.memoized,
+            "llm": self.llm,
+        }
+
+
+page_classifier = PageClassifier()
@@ -0,0 +1,55 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from playwright.async_api import BrowserContext, Error, Page
+
+from backend.logging import get_logger
+from backend.scrapers.page_cache import page_cache
+
+logger = get_logger()
+
+
+class PagePool:
+    def __init__(self, context: BrowserContext, size: int) -> None:
+        self.context = context
+        self.size = size
+        self._semaphore = asyncio.Semaphore(size)
+        self._idle: list[Page] = []
+        self.created = 0
+        self.leased = 0
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Page]:
+        # Tabs are opened lazily and reused, at most `size` of them exist at once
+        async with self._semaphore:
+            page = self._idle.pop() if self._idle else await self._new_page()
+            self.leased += 1
+            try:
+                yield page
+            finally:
+                await self._reset(page)
+
+    async def _new_page(self) -> Page:
+        self.created += 1
+        return await self.context.new_page()
+
+    async def _reset(self, page: Page) -> None:
+        page_cache.invalidate(page)
+        if page.is_closed():
+            return
+        try:
+            # Drops the DOM and scripts of the previous job offer
+            await page.goto("about:blank")
+        except Error as e:
+            logger.error(f"Could not reset pooled page, closing it: {e}")
+            await page.close()
+            return
+        self._idle.append(page)
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._idle.pop().close()
+
+    def stats(self) -> dict[str, int]:
+        return {"created": self.created, "leased": self.leased}
@@ -0,0 +1,213 @@
+import asyncio
+
+from playwright.async_api import Error, Locator, Page
+
+from backend.config import settings
+from backend.database.models import AttributeType, StepSelector
+from backend.logging import get_logger
+from backend.scrapers.selectors import (
+    attribute_selector,
+    get_site,
+    id_selector,
+    selector_compiler,
+)
+
+logger = get_logger()
+
+
+# Collects other ways of finding an already chosen element, from the most to
+# the least specific, so the step survives markup changes of a single attribute
+ELEMENT_SELECTORS_SCRIPT = """
+(element) => {
+    const selectors = [];
+    if (element.id && document.querySelectorAll(`#${CSS.escape(element.id)}`).length === 1) {
+        selectors.push(["id", element.id]);
+    }
+    for (const [attribute, attributeType] of [["name", "name"], ["aria-label", "aria_label"]]) {
+        const value = element.getAttribute(attribute);
+        if (value) {
+            selectors.push([attributeType, value]);
+        }
+    }
+
+    const tag = element.tagName.toLowerCase();
+    const type = (element.getAttribute("type") || "text").toLowerCase();
+    const implicitRoles = {a: element.hasAttribute("href") ? "link" : "", button: "button", select: "combobox", textarea: "textbox"};
+    const inputRoles = {button: "button", submit: "button", reset: "button", checkbox: "checkbox", radio: "radio", text: "textbox", email: "textbox", search: "searchbox", tel: "textbox", url: "textbox"};
+    const role = element.getAttribute("role") || (tag === "input" ? inputRoles[type] : implicitRoles[tag]);
+    const compact = (value) => (value || "").replace(/\\s+/g, " ").trim();
+    const text = compact(element.innerText);
+    // Same sources of the accessible name get_by_role matches against, values
+    // of form fields are what the user typed and are never saved
+    const formField = ["input", "textarea", "select"].includes(tag);
+    const labelledBy = (element.getAttribute("aria-labelledby") || "")
+        .split(/\\s+/)
+        .map((id) => document.getElementById(id))
+        .filter(Boolean)
+        .map((label) => compact(label.innerText))
+        .join(" ");
+    const label = compact(Array.from(element.labels || []).map((label) => label.innerText).join(" "));
+    const buttonLabel = tag === "input" && ["button", "submit", "reset"].includes(type) ? compact(element.value) : "";
+    const accessibleName = compact(element.getAttribute("aria-label")) || labelledBy || label || buttonLabel || (formField ? "" : text);
+    if (role && accessibleName) {
+        selectors.push(["role", `${role}:${accessibleName}`]);
+    }
+    if (text && !formField && text.length <= 80) {
+        selectors.push(["text", text]);
+    }
+
+    const path = [];
+    for (let node = element; node && node.nodeType === Node.ELEMENT_NODE; node = node.parentElement) {
+        if (node.id && node !== element) {
+            path.unshift(`#${CSS.escape(node.id)}`);
+            break;
+        }
+        const nodeTag = node.tagName.toLowerCase();
+        const siblings = node.parentElement
+            ? Array.from(node.parentElement.children).filter((sibling) => sibling.tagName === node.tagName)
+            : [];
+        path.unshift(siblings.length > 1 ? `${nodeTag}:nth-of-type(${siblings.indexOf(node) + 1})` : nodeTag);
+    }
+    selectors.push(["css_path", path.join(" > ")]);
+    return selectors;
+}
+"""
+
+
+async def get_element_selectors(element: Locator) -> list[StepSelector]:
+    try:
+        selectors = await element.first.evaluate(ELEMENT_SELECTORS_SCRIPT)
+    except Exception as e:
+        logger.error(f"Could not collect selectors of element: {e}")
+        return []
+    return [
+        StepSelector(
+            html_element_attribute=attribute,
+            attribute_type=AttributeType(attribute_type),
+        )
+        for attribute_type, attribute in selectors
+    ]
+
+
+class Probe:
+    def __init__(
+        self,
+        name: str,
+        locator: Locator,
+        attribute: str,
+        attribute_type: AttributeType,
+    ) -> None:
+        self.name = name
+        self.locator = locator
+        self.attribute = attribute
+        self.attribute_type = attribute_type
+        self.count = 0
+
+    def __repr__(self) -> str:
+        return f"{self.name}={self.attribute!r}: {self.count}"
+
+
+def get_role_locator(page: Page, attribute: str) -> Locator:
+    role, _, name = attribute.partition(":")
+    return page.get_by_role(role, name=name or None, exact=True)
+
+
+def get_probes(page: Page, attributes: dict) -> list[Probe]:
+    # Ordered from the most to the least specific attribute
+    strategies = (
+        (
+            "id",
+            lambda value: page.locator(id_selector(value)),
+            AttributeType.id,
+        ),
+        (
+            "name",
+            lambda value: page.locator(attribute_selector("name", value)),
+            AttributeType.name,
+        ),
+        (
+            "aria-label",
+            lambda value: page.get_by_label(value, exact=True),
+            AttributeType.aria_label,
+        ),
+        (
+            "placeholder",
+            lambda value: page.get_by_placeholder(value, exact=True),
+            AttributeType.placeholder,
+        ),
+        (
+            "text",
+            lambda value: page.get_by_text(value, exact=True),
+            AttributeType.text,
+        ),
+        (
+            "role",
+            lambda value: get_role_locator(page, value),
+            AttributeType.role,
+        ),
+        (
+            "type",
+            lambda value: page.locator(attribute_selector("type", value)),
+            AttributeType.element_type,
+        ),
+    )
+    role = attributes.get("role")
+    if role and isinstance(role, str):
+        # Saved in the same "role:name" format as recorded alternatives
+        name = attributes.get("aria-label") or attributes.get("text")
+        attributes = {
+            **attributes,
+            "role": f"{role}:{name if isinstance(name, str) else ''}",
+        }
+    probes = [
+        Probe(
+            key, get_locator(attributes[key]), attributes[key], attribute_type
+        )
+        for key, get_locator, attribute_type in strategies
+        if attributes.get(key) and isinstance(attributes[key], str)
+    ]
+
+    class_list = attributes.get("classList")
+    class_selector = (
+        selector_compiler.compile_classes(class_list, get_site(page.url))
+        if class_list and isinstance(class_list, list)
+        else None
+    )
+    if class_selector:
+        probes.append(
+            Probe(
+                "classList",
+                page.locator(class_selector),
+                class_selector,
+                AttributeType.class_l,
+            )
+        )
+    return probes
+
+
+async def count_probes(probes: list[Probe]) -> None:
+    # All counts are sent at once, so they cost one round-trip instead of one
+    # for each attribute
+    counts = await asyncio.gather(
+        *(probe.locator.count() for probe in probes), return_exceptions=True
+    )
+    for probe, count in zip(probes, counts):
+        if isinstance(count, Error):
+            logger.error(f"Invalid selector for {probe.name}: {count}")
+            count = 0
+        elif isinstance(count, BaseException):
+            raise count
+        probe.count = count
+    await log_probes(probes)
+
+
+async def log_probes(probes: list[Probe]) -> None:
+    logger.info(f"Probed locators: {probes}")
+    if settings.DEBUG:
+        listings = await asyncio.gather(
+            *(probe.locator.all() for probe in probes if probe.count)
+        )
+        for probe, listing in zip(
+            [probe for probe in probes if probe.count], listings
+        ):
+            logger.debug(f"{probe}\n{listing}")
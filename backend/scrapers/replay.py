@@ -0,0 +1,174 @@
+import asyncio
+import datetime
+
+from playwright.async_api import Locator, Page
+
+from backend.database.models import (
+    AttributeType,
+    AutomationSteps,
+    Step,
+    StepAction,
+    StepSelector,
+)
+from backend.logging import get_logger
+from backend.scrapers.probing import Probe, count_probes
+from backend.scrapers.utils import get_locator
+
+logger = get_logger()
+
+
+def _score(selector: StepSelector) -> float:
+    # Selectors with no history start at 0.5, so one recorded failure is
+    # enough to let a working alternative take over
+    return (selector.successes + 1) / (
+        selector.successes + selector.failures + 2
+    )
+
+
+def _same(selector: StepSelector, other: StepSelector) -> bool:
+    return (
+        selector.attribute_type == other.attribute_type
+        and selector.html_element_attribute == other.html_element_attribute
+    )
+
+
+async def _is_found(probe: Probe, unique: bool) -> bool:
+    if not unique:
+        return probe.count > 0
+    return probe.count == 1 and await probe.locator.is_visible()
+
+
+def build_step(
+    name: str,
+    action: StepAction,
+    attribute: str,
+    attribute_type: AttributeType,
+    arguments: dict | None = None,
+    alternatives: list[StepSelector] | None = None,
+) -> Step:
+    selectors = [
+        StepSelector(
+            html_element_attribute=attribute, attribute_type=attribute_type
+        )
+    ]
+    for selector in alternatives or []:
+        if not any(_same(selector, known) for known in selectors):
+            selectors.append(selector)
+    return Step(
+        name=name,
+        action=action,
+        html_element_attribute=attribute,
+        attribute_type=attribute_type,
+        arguments=arguments or {},
+        selectors=selectors,
+    )
+
+
+class StepReplay:
+    def __init__(self, automation_steps: AutomationSteps | dict | None) -> None:
+        # JSON column gives back a plain dict
+        self.automation_steps = AutomationSteps.model_validate(
+            automation_steps or {}
+        )
+        self.changed = False
+        self.replayed = 0
+        self.recorded = 0
+        self.healed = 0
+
+    def get_steps(self, group: str) -> list[Step]:
+        return getattr(self.automation_steps, group)
+
+    def get_step(self, group: str, name: str) -> Step | None:
+        for step in self.get_steps(group):
+            if step.name == name:
+                return step
+        return None
+
+    def record_step(self, group: str, step: Step) -> None:
+        previous = self.get_step(group, step.name)
+        if previous:
+            # Selectors that are still valid keep their history
+            for selector in step.selectors:
+                for old in previous.selectors:
+                    if _same(selector, old):
+                        selector.successes = old.successes
+                        selector.failures = old.failures
+        if step.selectors:
+            self.mark(step, step.selectors[0], True)
+
+        steps = [
+            recorded
+            for recorded in self.get_steps(group)
+            if recorded.name != step.name
+        ]
+        steps.append(step)
+        setattr(self.automation_steps, group, steps)
+        self.changed = True
+        self.recorded += 1
+        logger.info(f"Recorded step {group}.{step.name}: {step}")
+
+    def truncate(self, group: str, length: int) -> None:
+        if len(self.get_steps(group)) > length:
+            setattr(
+                self.automation_steps, group, self.get_steps(group)[:length]
+            )
+            self.changed = True
+
+    def ranked_selectors(self, step: Step) -> list[StepSelector]:
+        if not step.selectors:
+            # Steps recorded before selectors were tracked
+            step.selectors = [
+                StepSelector(
+                    html_element_attribute=step.html_element_attribute,
+                    attribute_type=step.attribute_type,
+                )
+            ]
+        return sorted(step.selectors, key=_score, reverse=True)
+
+    def mark(self, step: Step, selector: StepSelector, success: bool) -> None:
+        if success:
+            selector.successes += 1
+            selector.last_verified = datetime.datetime.now(datetime.UTC)
+            # The main attribute always points at the best known selector
+            step.html_element_attribute = selector.html_element_attribute
+            step.attribute_type = selector.attribute_type
+        else:
+            selector.failures += 1
+        self.changed = True
+
+    async def locate(
+        self, page: Page, step: Step, unique: bool = True
+    ) -> list[tuple[StepSelector, Locator]]:
+        # All selectors are counted at once, so the whole ladder costs one
+        # round-trip; the ones that are missing from the page are failures
+        selectors = self.ranked_selectors(step)
+        probes = [
+            Probe(
+                selector.attribute_type,
+                await get_locator(page, selector),
+                selector.html_element_attribute,
+                selector.attribute_type,
+            )
+            for selector in selectors
+        ]
+        await count_probes(probes)
+        # Only a single visible match is the recorded element, hidden copies
+        # (e.g. of a mobile menu) would time out when acted on
+        results = await asyncio.gather(
+            *(_is_found(probe, unique) for probe in probes),
+            return_exceptions=True,
+        )
+        found = []
+        for selector, probe, is_found in zip(selectors, probes, results):
+            if is_found is True:
+                found.append((selector, probe.locator))
+            else:
+                self.mark(step, selector, False)
+        return found
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "replayed": self.replayed,
+            "healed": self.healed,
+            "recorded": self.recorded,
+        }
@@ -0,0 +1,182 @@
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Route
+
+from backend.config import settings
+from backend.logging import get_logger
+
+logger = get_logger()
+
+# Nothing of these ends up in the cleaned page content, stylesheets are kept
+# because element visibility depends on them
+DEFAULT_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+TRACKER_DOMAINS = frozenset(
+    {
+        "google-analytics.com",
+        "googletagmanager.com",
+        "googleadservices.com",
+        "googlesyndication.com",
+        "doubleclick.net",
+        "adservice.google.com",
+        "connect.facebook.net",
+        "ads.linkedin.com",
+        "snap.licdn.com",
+        "bat.bing.com",
+        "clarity.ms",
+        "hotjar.com",
+        "fullstory.com",
+        "segment.com",
+        "segment.io",
+        "mixpanel.com",
+        "amplitude.com",
+        "nr-data.net",
+        "criteo.com",
+        "taboola.com",
+        "outbrain.com",
+        "scorecardresearch.com",
+        "quantserve.com",
+        "analytics.tiktok.com",
+    }
+)
+# Blocked requests are never downloaded, so their size is estimated from
+# typical sizes of each resource type in bytes
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 40_000,
+    "stylesheet": 20_000,
+    "xhr": 2_000,
+    "fetch": 2_000,
+    "ping": 500,
+}
+DEFAULT_RESOURCE_BYTES = 5_000
+
+
+def matches_domain(host: str, domains: frozenset[str] | set[str]) -> bool:
+    parts = host.split(".")
+    return any(
+        ".".join(parts[index:]) in domains for index in range(len(parts))
+    )
+
+
+class ResourcePolicy:
+    def __init__(
+        self,
+        block_types: set[str] | frozenset[str] = DEFAULT_BLOCKED_RESOURCE_TYPES,
+        block_domains: set[str] | frozenset[str] = TRACKER_DOMAINS,
+        allow_types: set[str] | frozenset[str] = frozenset(),
+        allow_domains: set[str] | frozenset[str] = frozenset(),
+    ) -> None:
+        self.block_types = frozenset(block_types) - frozenset(allow_types)
+        self.block_domains = frozenset(block_domains)
+        self.allow_domains = frozenset(allow_domains)
+
+    def is_blocked(
+        self, resource_type: str, host: str, main_frame: bool = False
+    ) -> bool:
+        # The page itself is always loaded, documents of iframes, e.g. tracker
+        # pixels, are not. Allowed domains win over blocked ones
+        if main_frame or matches_domain(host, self.allow_domains):
+            return False
+        return resource_type in self.block_types or matches_domain(
+            host, self.block_domains
+        )
+
+
+def get_resource_policy(url: str) -> ResourcePolicy:
+    # Overrides are added to the default profile, e.g.
+    # {"jobs.example.com": {"allow_types": ["image"], "block_domains": ["cdn.example.com"]}}
+    host = urlsplit(url).hostname or ""
+    override = next(
+        (
+            override
+            for site, override in settings.RESOURCE_POLICY_OVERRIDES.items()
+            if matches_domain(host, {site})
+        ),
+        {},
+    )
+    return ResourcePolicy(
+        block_types=DEFAULT_BLOCKED_RESOURCE_TYPES
+        | set(override.get("block_types", [])),
+        block_domains=TRACKER_DOMAINS | set(override.get("block_domains", [])),
+        allow_types=set(override.get("allow_types", [])),
+        allow_domains=set(override.get("allow_domains", [])),
+    )
+
+
+class ResourceStats:
+    def __init__(self) -> None:
+        self.blocked: dict[str, int] = {}
+        self.allowed = 0
+
+    def record(self, resource_type: str, blocked: bool) -> None:
+        if blocked:
+            self.blocked[resource_type] = self.blocked.get(resource_type, 0) + 1
+        else:
+            self.allowed += 1
+
+    def stats(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "blocked": dict(self.blocked),
+            "estimated_bytes_saved": sum(
+                ESTIMATED_RESOURCE_BYTES.get(
+                    resource_type, DEFAULT_RESOURCE_BYTES
+                )
+                * count
+                for resource_type, count in self.blocked.items()
+            ),
+        }
+
+    def reset(self) -> None:
+        self.blocked.clear()
+        self.allowed = 0
+
+
+_resource_stats: ContextVar[ResourceStats | None] = ContextVar(
+    "resource_stats", default=None
+)
+
+
+def collect_resource_stats() -> ResourceStats:
+    # Every scraping run gets its own stats, so runs of other users do not
+    # mix with them
+    stats = ResourceStats()
+    _resource_stats.set(stats)
+    return stats
+
+
+async def install_resource_policy(
+    context: BrowserContext, policy: ResourcePolicy
+) -> None:
+    # Routes are handled outside of the run's task, so its stats are taken
+    # here
+    stats = _resource_stats.get() or ResourceStats()
+
+    async def handle(route: Route) -> None:
+        request = route.request
+        # Only navigations have a frame for sure, requests of service workers
+        # do not have one
+        main_frame = (
+            request.is_navigation_request()
+            and request.frame.parent_frame is None
+        )
+        blocked = policy.is_blocked(
+            request.resource_type,
+            urlsplit(request.url).hostname or "",
+            main_frame,
+        )
+        stats.record(request.resource_type, blocked)
+        if blocked:
+            await route.abort("blockedbyclient")
+        else:
+            # Lets routes added before this one, e.g. recorded responses, handle
+            # the request
+            await route.fallback()
+
+    await context.route("**/*", handle)
+    logger.info(
+        f"Blocking resource types {sorted(policy.block_types)} and {len(policy.block_domains)} domains"
+    )
@@ -0,0 +1,151 @@
+import re
+from urllib.parse import urlsplit
+
+from backend.logging import get_logger
+
+logger = get_logger()
+
+# Classes that only style the element or change with every build or state,
+# selecting by them either matches half of the page or nothing on next visit
+UTILITY_CLASS = re.compile(
+    r"^-?("
+    r"[mp][trblxyse]?-(\d+(\.\d+)?|px|auto)"
+    r"|((min|max)-)?[wh]-(\d+(\.\d+)?|px|auto|full|screen|min|max|fit)"
+    r"|gap(-[xy])?-[\w.]+"
+    r"|(space|divide)-[xy]-[\w.]+|z-\w+|opacity-\w+|order-\w+"
+    r"|flex(-\w+)*|grid(-\w+)*|col(-\w+)+|row(-\w+)+|items-\w+|justify-\w+"
+    r"|self-\w+|content-\w+|place-\w+|basis-\w+|grow(-\d+)?|shrink(-\d+)?"
+    r"|block|inline(-\w+)?|hidden|contents|table(-\w+)*|visible|invisible"
+    r"|static|fixed|absolute|relative|sticky|inset(-\w+)*|(top|right|bottom|left)-\w+"
+    r"|overflow(-\w+)*|truncate|text-\w+(-\d+)?|font-\w+|leading-\w+|tracking-\w+"
+    r"|bg-[\w-]+|border(-[\w-]+)?|rounded(-[\w-]+)?|shadow(-\w+)?|ring(-[\w-]+)?"
+    r"|outline(-\w+)?|cursor-\w+|select-\w+|transition(-\w+)?|duration-\d+"
+    r"|ease-[\w-]+|animate-\w+|sr-only|not-sr-only|container|clearfix"
+    r")$"
+)
+STATE_CLASS = re.compile(
+    r"^(active|hover|focus(ed)?|selected|visited|disabled|open|closed|current"
+    r"|(is|has)-[\w-]+|ng-[\w-]+)$"
+)
+# Hashes of CSS-in-JS and CSS modules, e.g. "css-1x2y3z", "sc-bdVaJa",
+# "Card_title__3kPq2" or "a1b2c3d"; BEM elements like "job-card__title" have
+# no digits in the suffix
+HASHED_CLASS = re.compile(
+    r"^(css|sc|jss|emotion|makeStyles|styled)-[\w-]+$"
+    r"|__(?=[\w-]*\d[\w-]*[a-zA-Z])[\w-]{5,}$"
+    r"|(^|[-_])(?=[a-zA-Z]*\d[a-zA-Z]*\d)(?=\d*[a-zA-Z])[a-zA-Z\d]{5,}($|[-_])"
+)
+# Tailwind variants and arbitrary values, e.g. "md:flex" or "tw-w-[120px]"
+VARIANT_CHARACTERS = set("[]:/!@%")
+
+
+def css_escape(identifier: str) -> str:
+    # Same as CSS.escape in browsers
+    escaped = []
+    for index, character in enumerate(identifier):
+        code = ord(character)
+        if code == 0:
+            escaped.append("\ufffd")
+        elif (
+            0x01 <= code <= 0x1F
+            or code == 0x7F
+            or (index == 0 and "0" <= character <= "9")
+            or (index == 1 and "0" <= character <= "9" and identifier[0] == "-")
+        ):
+            escaped.append(f"\\{code:x} ")
+        elif index == 0 and character == "-" and len(identifier) == 1:
+            escaped.append("\\-")
+        elif (
+            code >= 0x80
+            or character in "-_"
+            or (character.isascii() and character.isalnum())
+        ):
+            escaped.append(character)
+        else:
+            escaped.append(f"\\{character}")
+    return "".join(escaped)
+
+
+def css_string(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return re.sub(r"[\n\r\f]", lambda match: f"\\{ord(match[0]):x} ", escaped)
+
+
+def id_selector(value: str) -> str:
+    return f"#{css_escape(value)}"
+
+
+def attribute_selector(attribute: str, value: str) -> str:
+    return f'[{attribute}="{css_string(value)}"]'
+
+
+def is_volatile_class(class_name: str) -> bool:
+    return bool(
+        HASHED_CLASS.search(class_name) or STATE_CLASS.match(class_name)
+    )
+
+
+def is_utility_class(class_name: str) -> bool:
+    return bool(
+        VARIANT_CHARACTERS.intersection(class_name)
+        or UTILITY_CLASS.match(class_name)
+    )
+
+
+def get_site(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+class SelectorCompiler:
+    def __init__(self) -> None:
+        self._sites: dict[str, dict[tuple[str, ...], str | None]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def compile_classes(
+        self, class_list: list[str], site: str = ""
+    ) -> str | None:
+        classes = tuple(
+            class_name
+            for class_name in class_list
+            if isinstance(class_name, str) and class_name.strip()
+        )
+        compiled = self._sites.setdefault(site, {})
+        if classes in compiled:
+            self.hits += 1
+            return compiled[classes]
+
+        self.misses += 1
+        stable = [
+            class_name
+            for class_name in classes
+            if not is_volatile_class(class_name)
+        ]
+        # Utility and hashed classes are only used when nothing else describes
+        # the element, hashes still work until the site is deployed again
+        semantic = (
+            [
+                class_name
+                for class_name in stable
+                if not is_utility_class(class_name)
+            ]
+            or stable
+            or list(classes)
+        )
+        selector = (
+            "".join(f".{css_escape(class_name)}" for class_name in semantic)
+            if semantic
+            else None
+        )
+        if len(semantic) != len(classes):
+            logger.info(
+                f"Selector {selector} compiled from classes {list(classes)}"
+            )
+        compiled[classes] = selector
+        return selector
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+selector_compiler = SelectorCompiler()
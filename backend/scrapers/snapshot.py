@@ -0,0 +1,129 @@
+import json
+
+from playwright.async_api import Locator, Page
+
+from backend.logging import get_logger
+from backend.scrapers.page_cache import page_cache
+
+logger = get_logger()
+
+SNAPSHOT_ELEMENTS = ", ".join(
+    (
+        "a",
+        "button",
+        "input",
+        "select",
+        "textarea",
+        "label",
+        "summary",
+        "[role]",
+        "[onclick]",
+        "[contenteditable='true']",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "header",
+        "nav",
+        "main",
+        "form",
+        "footer",
+    )
+)
+SNAPSHOT_ATTRIBUTES = (
+    "id",
+    "name",
+    "type",
+    "aria-label",
+    "placeholder",
+    "role",
+    "href",
+)
+
+MARKER_ATTRIBUTE = "data-aa-id"
+
+# Runs inside of the page, so that only the outline crosses CDP instead of the
+# whole serialized DOM. Elements keep their markers between snapshots, so older
+# locators stay valid and an unchanged page gives the same, cacheable prompt
+SNAPSHOT_SCRIPT = """
+([selector, attributes, maxTextLength, markerAttribute]) => {
+    const landmarks = new Set(["header", "nav", "main", "form", "footer"]);
+    const buttonTypes = new Set(["button", "submit", "reset"]);
+    window.__aaNextId = window.__aaNextId || 0;
+    const elements = [];
+    for (const element of document.querySelectorAll(selector)) {
+        const box = element.getBoundingClientRect();
+        if (box.width === 0 || box.height === 0) {
+            continue;
+        }
+        const style = window.getComputedStyle(element);
+        if (style.visibility === "hidden" || style.display === "none" || style.opacity === "0") {
+            continue;
+        }
+
+        let marker = element.getAttribute(markerAttribute);
+        if (!marker) {
+            marker = String(window.__aaNextId++);
+            element.setAttribute(markerAttribute, marker);
+        }
+        const tag = element.tagName.toLowerCase();
+        const item = {"aa-id": marker, tag: tag};
+        for (const attribute of attributes) {
+            const value = element.getAttribute(attribute);
+            if (value) {
+                item[attribute] = value;
+            }
+        }
+        if (element.classList.length) {
+            item.classList = Array.from(element.classList);
+        }
+        // Text of landmarks is the text of all of their children, which are
+        // already in the outline. Only labels of button inputs are read from
+        // their value, other inputs hold what the user typed, e.g. passwords
+        const buttonLabel = tag === "input" && buttonTypes.has((element.getAttribute("type") || "").toLowerCase()) ? element.value : "";
+        const text = landmarks.has(tag) ? "" : (element.innerText || buttonLabel || "");
+        const compactText = text.replace(/\\s+/g, " ").trim();
+        if (compactText) {
+            item.text = compactText.slice(0, maxTextLength);
+        }
+        item.box = [box.x, box.y + window.scrollY, box.width, box.height].map(Math.round);
+        elements.push(item);
+    }
+    return elements;
+}
+"""
+
+
+async def get_page_snapshot(page: Page, max_text_length: int = 100) -> str:
+    return await page_cache.get(
+        page,
+        f"snapshot-{max_text_length}",
+        lambda: _take_page_snapshot(page, max_text_length),
+    )
+
+
+async def _take_page_snapshot(page: Page, max_text_length: int) -> str:
+    elements = await page.evaluate(
+        SNAPSHOT_SCRIPT,
+        [
+            SNAPSHOT_ELEMENTS,
+            SNAPSHOT_ATTRIBUTES,
+            max_text_length,
+            MARKER_ATTRIBUTE,
+        ],
+    )
+    snapshot = json.dumps(
+        {"url": page.url, "elements": elements},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    logger.info(
+        f"Page snapshot has {len(elements)} elements, {len(snapshot)} characters"
+    )
+    return snapshot
+
+
+def get_marker_locator(page: Page, marker: str) -> Locator:
+    return page.locator(f'[{MARKER_ATTRIBUTE}="{marker}"]')
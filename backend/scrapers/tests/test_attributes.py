@@ -0,0 +1,140 @@
+import pytest
+
+from backend.database.models import AttributeType, StepSelector
+from backend.scrapers import utils
+from backend.scrapers.utils import (
+    _request_attributes,
+    get_stable_attribute,
+    verify_if_right_element_was_chosen,
+)
+
+
+class FakeLLM:
+    def __init__(self, responses: list[str]) -> None:
+        self.responses = responses
+        self.requests: list[dict] = []
+        self.forgotten: list[str] = []
+
+    async def send_req_to_llm(self, prompt: str, **kwargs) -> str:
+        self.requests.append({"prompt": prompt, **kwargs})
+        return self.responses.pop(0)
+
+    async def forget_llm_response(
+        self, prompt: str, escalate: bool = False
+    ) -> None:
+        self.forgotten.append((prompt, escalate))
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    def make(responses: list[str]) -> FakeLLM:
+        llm = FakeLLM(responses)
+        monkeypatch.setattr(utils, "send_req_to_llm", llm.send_req_to_llm)
+        monkeypatch.setattr(
+            utils, "forget_llm_response", llm.forget_llm_response
+        )
+        return llm
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_attributes_are_parsed(llm):
+    fake = llm(['{"id": "email"}'])
+
+    assert await _request_attributes("prompt") == {"id": "email"}
+    assert fake.forgotten == []
+
+
+@pytest.mark.asyncio
+async def test_missing_element_is_a_valid_answer(llm):
+    fake = llm(["null"])
+
+    assert await _request_attributes("prompt") is None
+    assert fake.forgotten == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("response", ["{'id': 'email'", "[1, 2]"])
+async def test_broken_answer_is_asked_again_from_stronger_model(llm, response):
+    fake = llm([response, '{"id": "email"}'])
+
+    assert await _request_attributes("prompt") == {"id": "email"}
+    assert [request["escalate"] for request in fake.requests] == [False, True]
+    assert fake.forgotten == [("prompt", False)]
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_escalated_answer_is_broken(llm):
+    fake = llm(["{'id': 'email'", "[1, 2]"])
+
+    assert await _request_attributes("prompt") is None
+    assert fake.forgotten == [("prompt", False), ("prompt", True)]
+
+
+class FakeLocator:
+    def __init__(self, count: int = 1) -> None:
+        self._count = count
+
+    async def count(self) -> int:
+        return self._count
+
+    async def all_inner_texts(self) -> list[str]:
+        return ["Email"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("verdict", [True, False])
+async def test_only_rejected_verification_is_forgotten(monkeypatch, verdict):
+    requests = []
+    forgotten = []
+
+    async def send_decision_req_to_llm(prompt: str, **kwargs) -> bool:
+        requests.append(kwargs)
+        return verdict
+
+    async def forget_decision(prompt: str) -> None:
+        forgotten.append(prompt)
+
+    monkeypatch.setattr(
+        utils, "send_decision_req_to_llm", send_decision_req_to_llm
+    )
+    monkeypatch.setattr(utils, "forget_decision", forget_decision)
+
+    assert (
+        await verify_if_right_element_was_chosen(
+            FakeLocator(), {"id": "email"}, "email input"
+        )
+        is verdict
+    )
+    assert requests[0].get("use_cache", True)
+    assert len(forgotten) == (0 if verdict else 1)
+
+
+@pytest.mark.asyncio
+async def test_marked_element_is_saved_by_its_own_unique_selector(monkeypatch):
+    selectors = [
+        StepSelector(
+            html_element_attribute="login",
+            attribute_type=AttributeType.name,
+        ),
+        StepSelector(
+            html_element_attribute="form > input:nth-of-type(2)",
+            attribute_type=AttributeType.css_path,
+        ),
+    ]
+    counts = {"login": 2, "form > input:nth-of-type(2)": 1}
+
+    async def get_element_selectors(locator) -> list[StepSelector]:
+        return selectors
+
+    async def get_locator(page, step) -> FakeLocator:
+        return FakeLocator(counts[step.html_element_attribute])
+
+    monkeypatch.setattr(utils, "get_element_selectors", get_element_selectors)
+    monkeypatch.setattr(utils, "get_locator", get_locator)
+
+    assert await get_stable_attribute(None, FakeLocator()) == (
+        "form > input:nth-of-type(2)",
+        AttributeType.css_path,
+    )
@@ -0,0 +1,129 @@
+import datetime
+
+import pytest
+
+from backend.database.models import JobEntry, JobEvaluation, JobEvaluations
+from backend.scrapers import base_scraper
+from backend.scrapers.base_scraper import BaseScraper
+
+
+class FakeScraper(BaseScraper):
+    async def login_to_page(self) -> None:
+        pass
+
+    async def _navigate_to_job_list_page(self) -> None:
+        pass
+
+    async def get_job_entries(self):
+        return tuple()
+
+    async def navigate_to_next_page(self) -> bool:
+        return False
+
+    async def _go_to_next_job(self) -> bool:
+        return False
+
+    async def _apply_for_job(self):
+        pass
+
+    async def _get_job_information(self, url: str) -> JobEntry | None:
+        return None
+
+
+def make_job_entry(title: str) -> JobEntry:
+    return JobEntry(
+        title=title,
+        company_name="Company",
+        requirements="",
+        duties="",
+        about_project="",
+        offer_benefits="",
+        location="",
+        contract_type="",
+        employment_type="",
+        work_arrangement="",
+        additional_information=None,
+        company_url=None,
+        discovery_date=datetime.date(2024, 1, 1),
+        job_url=f"https://example.com/{title}",
+    )
+
+
+@pytest.fixture
+def scraper() -> FakeScraper:
+    return FakeScraper(
+        url="https://example.com",
+        email="user@example.com",
+        password="password",
+        context=None,
+        page=None,
+        website_info=None,
+    )
+
+
+@pytest.fixture
+def single_evaluations(monkeypatch) -> list[str]:
+    prompts = []
+
+    async def send_decision_req_to_llm(prompt: str, **kwargs) -> bool:
+        prompts.append(prompt)
+        return "accepted" in prompt
+
+    monkeypatch.setattr(
+        base_scraper, "send_decision_req_to_llm", send_decision_req_to_llm
+    )
+    return prompts
+
+
+def reply_with(monkeypatch, response) -> None:
+    async def send_req_to_llm(prompt: str, **kwargs):
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(base_scraper, "send_req_to_llm", send_req_to_llm)
+
+
+@pytest.mark.asyncio
+async def test_missing_and_out_of_range_indices_are_evaluated_one_by_one(
+    scraper, single_evaluations, monkeypatch
+):
+    job_entries = [
+        make_job_entry("first"),
+        make_job_entry("accepted"),
+        make_job_entry("third"),
+    ]
+    reply_with(
+        monkeypatch,
+        JobEvaluations(
+            evaluations=[
+                JobEvaluation(index=0, verdict=True, score=90),
+                JobEvaluation(index=5, verdict=True, score=90),
+            ]
+        ),
+    )
+
+    evaluations = await scraper.evaluate_jobs(job_entries)
+
+    assert [evaluation.index for evaluation in evaluations] == [0, 1, 2]
+    assert [evaluation.verdict for evaluation in evaluations] == [
+        True,
+        True,
+        False,
+    ]
+    assert evaluations[0].score == 90
+    assert len(single_evaluations) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("response", ["not json", ValueError("bad reply")])
+async def test_unparsable_reply_falls_back_to_single_evaluations(
+    scraper, single_evaluations, monkeypatch, response
+):
+    job_entries = [make_job_entry("accepted"), make_job_entry("second")]
+    reply_with(monkeypatch, response)
+
+    evaluations = await scraper.evaluate_jobs(job_entries)
+
+    assert [evaluation.verdict for evaluation in evaluations] == [True, False]
+    assert len(single_evaluations) == 2
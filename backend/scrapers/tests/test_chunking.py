@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import backend.scrapers.chunking
+from backend.scrapers.chunking import split_into_chunks
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(
+        backend.scrapers.chunking,
+        "count_tokens",
+        lambda text: len(text.split()),
+    )
+
+
+def test_content_that_fits_is_not_split():
+    content = "<html><body><p>one two</p></body></html>"
+    assert split_into_chunks(content, max_tokens=100) == [content]
+
+
+def test_html_is_split_on_element_boundaries():
+    tiles = "".join(
+        f'<li class="job"><a href="/jobs/{i}">Job number {i}</a></li>'
+        for i in range(20)
+    )
+    chunks = split_into_chunks(
+        f"<html><body><ul>{tiles}</ul></body></html>", max_tokens=20
+    )
+
+    assert len(chunks) > 1
+    assert all(len(chunk.split()) <= 20 for chunk in chunks)
+    joined = "".join(chunks)
+    for i in range(20):
+        assert f'<a href="/jobs/{i}">Job number {i}</a>' in joined
+
+
+def test_long_text_is_split_to_fit():
+    text = " ".join(f"word{i}" for i in range(100))
+    chunks = split_into_chunks(
+        f"<html><body><p>{text}</p></body></html>", max_tokens=30
+    )
+
+    assert all(len(chunk.split()) <= 30 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_snapshot_chunks_are_valid_outlines():
+    elements = [
+        {"aa-id": str(i), "tag": "a", "text": f"Job number {i}"}
+        for i in range(10)
+    ]
+    content = json.dumps({"url": "https://example.com", "elements": elements})
+    chunks = split_into_chunks(content, max_tokens=10, is_snapshot=True)
+
+    assert len(chunks) > 1
+    outlines = [json.loads(chunk) for chunk in chunks]
+    assert all(outline["url"] == "https://example.com" for outline in outlines)
+    assert [
+        element for outline in outlines for element in outline["elements"]
+    ] == elements
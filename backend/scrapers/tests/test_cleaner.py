@@ -0,0 +1,34 @@
+from backend.scrapers.cleaner import clean_html
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head><title>Jobs</title><style>a { color: red }</style></head>
+<body>
+<!-- tracking -->
+<h1>Python developer</h1>
+<p>Remote <svg><path d="M0 0"/></svg>or hybrid<img src="logo.png"></p>
+<script>window.x = 1</script>
+<a href="/apply" class="apply">Apply</a>
+</body>
+</html>"""
+
+
+def test_removed_tags_are_dropped_and_their_tail_text_is_kept():
+    cleaned = clean_html(PAGE)
+
+    for removed in ("<head", "<style", "<svg", "<img", "<script", "tracking"):
+        assert removed not in cleaned
+    assert "Remote or hybrid" in cleaned
+    assert '<a href="/apply" class="apply">Apply</a>' in cleaned
+    assert cleaned.startswith('<html lang="en">')
+
+
+def test_body_only_drops_everything_outside_body():
+    cleaned = clean_html(PAGE, body_only=True)
+
+    assert cleaned.startswith("<body>")
+    assert "<h1>Python developer</h1>" in cleaned
+
+
+def test_empty_page_is_cleaned_to_empty_string():
+    assert clean_html("  ") == ""
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from backend.scrapers.orchestrator import merge_concurrently
+
+
+def make_source(name: str, delay: float, items: int, running: list[int]):
+    async def source():
+        running.append(1)
+        try:
+            for index in range(items):
+                await asyncio.sleep(delay)
+                yield f"{name}-{index}"
+        finally:
+            running.pop()
+
+    return source
+
+
+@pytest.mark.asyncio
+async def test_sources_run_concurrently_up_to_limit():
+    running = []
+    peak = 0
+    pair_started = asyncio.Event()
+
+    async def watch(source):
+        nonlocal peak
+        # Every source waits for a second one, which never starts if sources
+        # run one after another
+        running.append(1)
+        if len(running) == 2:
+            pair_started.set()
+        await pair_started.wait()
+        try:
+            async for item in source():
+                peak = max(peak, len(running))
+                yield item
+        finally:
+            running.pop()
+            pair_started.clear()
+
+    sources = [
+        lambda source=make_source(name, 0, 2, []): watch(source)
+        for name in "abcd"
+    ]
+
+    async def merge() -> list[str]:
+        return [
+            item async for item in merge_concurrently(sources, max_concurrent=2)
+        ]
+
+    items = await asyncio.wait_for(merge(), timeout=5)
+
+    assert sorted(items) == sorted(
+        f"{name}-{i}" for name in "abcd" for i in range(2)
+    )
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_fast_source_is_not_held_back_by_slow_one():
+    running = []
+    sources = [
+        make_source("slow", 0.1, 1, running),
+        make_source("fast", 0.01, 3, running),
+    ]
+
+    items = [
+        item async for item in merge_concurrently(sources, max_concurrent=2)
+    ]
+
+    assert items == ["fast-0", "fast-1", "fast-2", "slow-0"]
+
+
+@pytest.mark.asyncio
+async def test_failing_source_does_not_stop_the_others():
+    async def failing():
+        yield "broken-0"
+        raise RuntimeError("board is down")
+
+    running = []
+    items = [
+        item
+        async for item in merge_concurrently(
+            [failing, make_source("ok", 0.01, 2, running)], max_concurrent=2
+        )
+    ]
+
+    assert sorted(items) == ["broken-0", "ok-0", "ok-1"]
+
+
+@pytest.mark.asyncio
+async def test_closing_merge_cancels_sources():
+    running = []
+    merged = merge_concurrently([make_source("long", 0.01, 100, running)], 1)
+
+    assert await anext(merged) == "long-0"
+    await merged.aclose()
+
+    assert running == []
@@ -0,0 +1,35 @@
+import pytest
+
+from backend.scrapers.page_cache import PageCache
+
+
+class FakePage:
+    def __init__(self) -> None:
+        self.url = "https://example.com/jobs"
+        self.mutations = 0
+
+    async def evaluate(self, script: str) -> str:
+        return f"document:{self.mutations}"
+
+
+@pytest.mark.asyncio
+async def test_content_is_reloaded_only_after_dom_change_or_invalidation():
+    page_cache = PageCache()
+    page = FakePage()
+    loads = 0
+
+    async def load() -> str:
+        nonlocal loads
+        loads += 1
+        return f"content {loads}"
+
+    assert await page_cache.get(page, "html", load) == "content 1"
+    assert await page_cache.get(page, "html", load) == "content 1"
+
+    page.mutations += 1
+    assert await page_cache.get(page, "html", load) == "content 2"
+
+    page_cache.invalidate(page)
+    assert await page_cache.get(page, "html", load) == "content 3"
+    assert await page_cache.get(page, "snapshot", load) == "content 4"
+    assert page_cache.stats() == {"hits": 1, "misses": 4}
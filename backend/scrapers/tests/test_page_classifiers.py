@@ -0,0 +1,102 @@
+import pytest
+from playwright.async_api import Error
+
+from backend.scrapers.page_classifiers import (
+    PageClassifier,
+    PageType,
+    classify_job_list_page,
+    classify_login_page,
+    get_url_template,
+    has_popup,
+)
+
+
+class FakePage:
+    def __init__(self, url: str, signals: dict) -> None:
+        self.url = url
+        self.signals = signals
+
+    async def evaluate(self, script: str) -> dict:
+        return self.signals
+
+
+def test_url_template_hides_ids():
+    assert (
+        get_url_template("https://example.com/jobs/python-dev-123/?ref=home")
+        == "example.com/jobs/*"
+    )
+    assert get_url_template("https://example.com/jobs/") == "example.com/jobs"
+
+
+def test_login_page_checks():
+    assert classify_login_page(
+        "https://example.com/", {"passwordInputs": 1}
+    ).is_page
+    check = classify_login_page(
+        "https://example.com/signin", {"emailInputs": 1}
+    )
+    assert check.is_page and check.confidence >= 0.8
+    check = classify_login_page("https://example.com/", {"emailInputs": 0})
+    assert not check.is_page and check.confidence >= 0.8
+    # Could be a newsletter form as well
+    assert (
+        classify_login_page(
+            "https://example.com/", {"emailInputs": 1}
+        ).confidence
+        < 0.8
+    )
+
+
+def test_job_list_page_checks():
+    assert classify_job_list_page(
+        "https://example.com/", {"jobPostings": 5}
+    ).is_page
+    check = classify_job_list_page("https://example.com/jobs", {"jobCards": 20})
+    assert check.is_page and check.confidence >= 0.8
+    assert not classify_job_list_page(
+        "https://example.com/jobs/1", {"jobPostings": 1}
+    ).is_page
+    check = classify_job_list_page(
+        "https://example.com/", {"repeatedCards": 10}
+    )
+    assert check.confidence < 0.8
+    # Tiles without links or a list that is still loading
+    check = classify_job_list_page("https://example.com/jobs", {})
+    assert not check.is_page and check.confidence < 0.8
+
+
+@pytest.mark.asyncio
+async def test_llm_is_asked_once_per_url_template():
+    classifier = PageClassifier()
+    questions = []
+
+    async def ask_llm() -> bool:
+        questions.append(True)
+        return True
+
+    signals = {"repeatedCards": 10, "jobCards": 0}
+    for url in ("https://example.com/list/1", "https://example.com/list/2"):
+        assert await classifier.is_page(
+            FakePage(url, signals), PageType.job_list, ask_llm
+        )
+    assert not await classifier.is_page(
+        FakePage("https://example.com/", {"passwordInputs": 0}),
+        PageType.login,
+        ask_llm,
+    )
+
+    assert len(questions) == 1
+    assert classifier.stats() == {"heuristic": 1, "memoized": 1, "llm": 1}
+
+
+class NavigatingPage:
+    async def evaluate(self, script: str) -> dict:
+        raise Error("Execution context was destroyed")
+
+
+@pytest.mark.asyncio
+async def test_popup_check():
+    assert await has_popup(FakePage("https://example.com/", True))
+    assert not await has_popup(FakePage("https://example.com/", False))
+    # Popup cannot be ruled out while the page navigates
+    assert await has_popup(NavigatingPage())
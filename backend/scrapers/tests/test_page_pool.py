@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from backend.scrapers.page_pool import PagePool
+
+
+class FakePage:
+    def __init__(self) -> None:
+        self.url = "about:blank"
+        self.closed = False
+
+    async def goto(self, url: str) -> None:
+        self.url = url
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.pages = []
+
+    async def new_page(self) -> FakePage:
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+@pytest.mark.asyncio
+async def test_pages_are_reused_and_reset():
+    context = FakeContext()
+    pool = PagePool(context, size=2)
+
+    for link in ("https://example.com/1", "https://example.com/2"):
+        async with pool.lease() as page:
+            await page.goto(link)
+
+    assert len(context.pages) == 1
+    assert context.pages[0].url == "about:blank"
+    assert pool.stats() == {"created": 1, "leased": 2}
+
+    await pool.close()
+    assert context.pages[0].closed
+
+
+@pytest.mark.asyncio
+async def test_leases_are_bounded_and_returned_on_error():
+    context = FakeContext()
+    pool = PagePool(context, size=2)
+    active = 0
+    peak = 0
+
+    async def fetch(index: int) -> None:
+        nonlocal active, peak
+        async with pool.lease():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if index % 2:
+                raise ValueError("broken offer")
+
+    await asyncio.gather(
+        *(fetch(index) for index in range(6)), return_exceptions=True
+    )
+
+    assert peak == 2
+    assert len(context.pages) == 2
+    assert all(not page.closed for page in context.pages)
+
+
+@pytest.mark.asyncio
+async def test_closed_pages_are_replaced():
+    context = FakeContext()
+    pool = PagePool(context, size=1)
+
+    async with pool.lease() as page:
+        await page.close()
+    async with pool.lease() as page:
+        assert not page.closed
+
+    assert len(context.pages) == 2
@@ -0,0 +1,42 @@
+from backend.database.models import AttributeType
+from backend.scrapers.probing import get_probes
+
+
+class FakePage:
+    url = "https://example.com/login"
+
+    def locator(self, selector: str) -> tuple:
+        return ("locator", selector)
+
+    def get_by_role(self, role: str, **kwargs) -> tuple:
+        return ("role", role, kwargs)
+
+    def get_by_text(self, text: str, **kwargs) -> tuple:
+        return ("text", text)
+
+
+def test_role_probe_is_saved_with_accessible_name():
+    probes = get_probes(
+        FakePage(), {"role": "button", "text": "Sign in", "type": "submit"}
+    )
+
+    role = next(probe for probe in probes if probe.name == "role")
+    assert role.attribute == "button:Sign in"
+    assert role.attribute_type == AttributeType.role
+    assert role.locator == (
+        "role",
+        "button",
+        {"name": "Sign in", "exact": True},
+    )
+    assert [probe.name for probe in probes] == ["text", "role", "type"]
+
+
+def test_role_probe_without_name():
+    [probe] = get_probes(FakePage(), {"role": "navigation"})
+
+    assert probe.attribute == "navigation:"
+    assert probe.locator == (
+        "role",
+        "navigation",
+        {"name": None, "exact": True},
+    )
@@ -0,0 +1,172 @@
+import pytest
+
+from backend.database.models import (
+    AttributeType,
+    Step,
+    StepAction,
+    StepSelector,
+)
+from backend.scrapers.replay import StepReplay, build_step
+
+
+def make_step(name: str, attribute: str) -> Step:
+    return build_step(name, StepAction.click, attribute, AttributeType.id)
+
+
+def test_loads_steps_from_json_column():
+    steps = StepReplay(
+        {
+            "login_to_page": [
+                {
+                    "name": "email",
+                    "action": "fill",
+                    "html_element_attribute": "email",
+                    "attribute_type": "id",
+                    "arguments": {"field": "email"},
+                }
+            ]
+        }
+    )
+
+    step = steps.get_step("login_to_page", "email")
+    assert step.action == StepAction.fill
+    assert step.arguments == {"field": "email"}
+    assert steps.get_steps("navigate_to_job_list") == []
+    assert not steps.changed
+
+
+def test_record_replaces_step_with_same_name():
+    steps = StepReplay(None)
+    steps.record_step("pass_cookies_popup", make_step("accept", "old"))
+    steps.record_step("pass_cookies_popup", make_step("accept", "new"))
+
+    assert [
+        step.html_element_attribute
+        for step in steps.get_steps("pass_cookies_popup")
+    ] == ["new"]
+    assert steps.changed
+
+
+def test_round_trip_through_json():
+    steps = StepReplay(None)
+    steps.record_step("navigate_to_job_list", make_step("0", "jobs"))
+    steps.record_step("navigate_to_job_list", make_step("1", "search"))
+
+    reloaded = StepReplay(steps.automation_steps.model_dump(mode="json"))
+
+    assert [
+        step.name for step in reloaded.get_steps("navigate_to_job_list")
+    ] == [
+        "0",
+        "1",
+    ]
+    reloaded.truncate("navigate_to_job_list", 1)
+    assert reloaded.get_step("navigate_to_job_list", "1") is None
+    assert reloaded.changed
+
+
+def test_failed_selector_falls_behind_alternative():
+    steps = StepReplay(None)
+    step = build_step(
+        "next",
+        StepAction.click,
+        "next-button",
+        AttributeType.id,
+        alternatives=[
+            StepSelector(
+                html_element_attribute="next-button",
+                attribute_type=AttributeType.id,
+            ),
+            StepSelector(
+                html_element_attribute="button:Next",
+                attribute_type=AttributeType.role,
+            ),
+        ],
+    )
+    steps.record_step("navigate_to_next_page", step)
+    primary, alternative = step.selectors
+    assert primary.successes == 1
+    assert primary.last_verified is not None
+
+    steps.mark(step, primary, False)
+    steps.mark(step, primary, False)
+    steps.mark(step, alternative, True)
+
+    assert steps.ranked_selectors(step)[0] is alternative
+    assert step.attribute_type == AttributeType.role
+    assert step.html_element_attribute == "button:Next"
+
+
+def test_rerecorded_step_keeps_history_of_same_selectors():
+    steps = StepReplay(None)
+    steps.record_step("pass_cookies_popup", make_step("accept", "accept"))
+    steps.record_step("pass_cookies_popup", make_step("accept", "accept"))
+
+    (selector,) = steps.get_step("pass_cookies_popup", "accept").selectors
+    assert selector.successes == 2
+
+
+class FakeLocator:
+    def __init__(self, count: int, visible: bool) -> None:
+        self._count = count
+        self.visible = visible
+
+    async def count(self) -> int:
+        return self._count
+
+    async def is_visible(self) -> bool:
+        return self.visible
+
+
+class FakePage:
+    def __init__(self, locators: dict[str, FakeLocator]) -> None:
+        self.locators = locators
+
+    def locator(self, selector: str) -> FakeLocator:
+        return self.locators.get(selector, FakeLocator(0, False))
+
+    def get_by_role(self, role: str, **kwargs) -> FakeLocator:
+        return self.locators.get(
+            f"{role}:{kwargs['name']}", FakeLocator(0, False)
+        )
+
+
+@pytest.mark.asyncio
+async def test_locate_accepts_only_unique_visible_matches():
+    steps = StepReplay(None)
+    step = build_step(
+        "next",
+        StepAction.click,
+        "next-button",
+        AttributeType.id,
+        alternatives=[
+            StepSelector(
+                html_element_attribute="button:Next",
+                attribute_type=AttributeType.role,
+            ),
+            StepSelector(
+                html_element_attribute="nav > button",
+                attribute_type=AttributeType.css_path,
+            ),
+            StepSelector(
+                html_element_attribute="footer > button",
+                attribute_type=AttributeType.css_path,
+            ),
+        ],
+    )
+    visible = FakeLocator(1, True)
+    page = FakePage(
+        {
+            "#next-button": FakeLocator(1, False),
+            "button:Next": FakeLocator(2, True),
+            "nav > button": visible,
+        }
+    )
+
+    found = await steps.locate(page, step)
+
+    assert [
+        (selector.html_element_attribute, locator)
+        for selector, locator in found
+    ] == [("nav > button", visible)]
+    assert [selector.failures for selector in step.selectors] == [1, 1, 0, 1]
@@ -0,0 +1,122 @@
+import pytest
+
+from backend.config import settings
+from backend.scrapers.resource_policy import (
+    ResourcePolicy,
+    ResourceStats,
+    get_resource_policy,
+    install_resource_policy,
+    matches_domain,
+)
+
+
+class FakeFrame:
+    def __init__(self, parent_frame=None) -> None:
+        self.parent_frame = parent_frame
+
+
+class FakeRequest:
+    def __init__(self, url: str, frame: FakeFrame) -> None:
+        self.url = url
+        self.resource_type = "document"
+        self.frame = frame
+
+    def is_navigation_request(self) -> bool:
+        return True
+
+
+class FakeRoute:
+    def __init__(self, request: FakeRequest) -> None:
+        self.request = request
+        self.aborted = False
+
+    async def abort(self, error_code: str) -> None:
+        self.aborted = True
+
+    async def fallback(self) -> None:
+        pass
+
+
+class FakeContext:
+    async def route(self, url: str, handler) -> None:
+        self.handler = handler
+
+
+def test_matches_domain_and_subdomains_only():
+    assert matches_domain("www.google-analytics.com", {"google-analytics.com"})
+    assert matches_domain("google-analytics.com", {"google-analytics.com"})
+    assert not matches_domain(
+        "notgoogle-analytics.com", {"google-analytics.com"}
+    )
+
+
+def test_default_policy_blocks_heavy_resources_and_trackers():
+    policy = ResourcePolicy()
+
+    assert policy.is_blocked("image", "jobs.example.com")
+    assert policy.is_blocked("font", "fonts.gstatic.com")
+    assert policy.is_blocked("script", "www.googletagmanager.com")
+    assert not policy.is_blocked("script", "jobs.example.com")
+    assert not policy.is_blocked("stylesheet", "jobs.example.com")
+    assert not policy.is_blocked("document", "jobs.example.com")
+
+
+def test_only_main_frame_document_is_exempt():
+    policy = ResourcePolicy()
+
+    assert not policy.is_blocked("document", "doubleclick.net", main_frame=True)
+    # Tracker iframes are blocked like any other request of their domain
+    assert policy.is_blocked("document", "doubleclick.net")
+    assert policy.is_blocked("image", "jobs.example.com", main_frame=False)
+
+
+def test_site_overrides_are_added_to_defaults(monkeypatch):
+    monkeypatch.setattr(
+        settings,
+        "RESOURCE_POLICY_OVERRIDES",
+        {
+            "example.com": {
+                "allow_types": ["image"],
+                "block_domains": ["chat.example.com"],
+                "allow_domains": ["hotjar.com"],
+            }
+        },
+    )
+
+    policy = get_resource_policy("https://jobs.example.com/list")
+    assert not policy.is_blocked("image", "jobs.example.com")
+    assert policy.is_blocked("media", "jobs.example.com")
+    assert policy.is_blocked("script", "chat.example.com")
+    assert not policy.is_blocked("script", "static.hotjar.com")
+
+    other = get_resource_policy("https://careers.example.org/")
+    assert other.is_blocked("image", "careers.example.org")
+
+
+def test_stats_estimate_saved_bytes():
+    stats = ResourceStats()
+    stats.record("image", True)
+    stats.record("image", True)
+    stats.record("script", False)
+
+    assert stats.stats() == {
+        "allowed": 1,
+        "blocked": {"image": 2},
+        "estimated_bytes_saved": 120_000,
+    }
+
+
+@pytest.mark.asyncio
+async def test_tracker_iframe_is_aborted_but_main_page_is_not():
+    context = FakeContext()
+    await install_resource_policy(context, ResourcePolicy())
+
+    page = FakeRoute(FakeRequest("https://doubleclick.net/", FakeFrame()))
+    iframe = FakeRoute(
+        FakeRequest("https://doubleclick.net/pixel", FakeFrame(FakeFrame()))
+    )
+    await context.handler(page)
+    await context.handler(iframe)
+
+    assert not page.aborted
+    assert iframe.aborted
@@ -0,0 +1,91 @@
+from backend.scrapers.selectors import (
+    SelectorCompiler,
+    attribute_selector,
+    css_escape,
+    id_selector,
+    is_utility_class,
+    is_volatile_class,
+)
+
+
+def test_css_escape_matches_browser():
+    assert css_escape("tw-w-[120px]") == "tw-w-\\[120px\\]"
+    assert css_escape("md:flex") == "md\\:flex"
+    assert css_escape("1col") == "\\31 col"
+    assert css_escape("-2") == "-\\32 "
+    assert css_escape("-") == "\\-"
+    assert css_escape("job_card-é") == "job_card-é"
+
+
+def test_attribute_values_are_quoted():
+    assert id_selector("user.email") == "#user\\.email"
+    assert attribute_selector("name", 'a"b') == '[name="a\\"b"]'
+
+
+def test_hashed_and_state_classes_are_volatile():
+    for class_name in (
+        "css-1x2y3z",
+        "sc-bdVaJa",
+        "Card_title__3kPq2",
+        "a1b2c3d",
+        "is-active",
+        "selected",
+    ):
+        assert is_volatile_class(class_name), class_name
+    for class_name in (
+        "job-card",
+        "heading1",
+        "button2",
+        "row",
+        "job-card__title",
+        "posting-list__title",
+        "offer__salary-range",
+    ):
+        assert not is_volatile_class(class_name), class_name
+
+
+def test_utility_classes():
+    for class_name in (
+        "p-4",
+        "-mt-0.5",
+        "mx-auto",
+        "h-full",
+        "flex",
+        "text-gray-500",
+        "md:flex",
+        "w-[120px]",
+    ):
+        assert is_utility_class(class_name), class_name
+    for class_name in ("job-card", "p-job", "pb-card", "m-offer", "w-listing"):
+        assert not is_utility_class(class_name), class_name
+
+
+def test_compiler_keeps_only_describing_classes():
+    compiler = SelectorCompiler()
+
+    assert (
+        compiler.compile_classes(
+            ["job-card", "p-4", "tw-w-[120px]", "css-1x2y3z"]
+        )
+        == ".job-card"
+    )
+    # Utility classes are better than nothing
+    assert (
+        compiler.compile_classes(["p-4", "tw-w-[120px]"])
+        == ".p-4.tw-w-\\[120px\\]"
+    )
+    assert compiler.compile_classes([]) is None
+    assert (
+        compiler.compile_classes(["posting-list__title", "text-lg"])
+        == ".posting-list__title"
+    )
+
+
+def test_compiled_selectors_are_memoized_per_site():
+    compiler = SelectorCompiler()
+
+    compiler.compile_classes(["job-card"], "jobs.example.com")
+    compiler.compile_classes(["job-card"], "jobs.example.com")
+    compiler.compile_classes(["job-card"], "careers.example.com")
+
+    assert compiler.stats() == {"hits": 1, "misses": 2}
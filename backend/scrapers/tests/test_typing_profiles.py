@@ -0,0 +1,46 @@
+from backend.config import settings
+from backend.database.models import TypingProfile
+from backend.scrapers.replay import StepReplay
+from backend.scrapers.typing_profiles import update_typing_profile
+
+
+def test_clean_logins_promote_profile_step_by_step():
+    profile, clean_logins = TypingProfile.cautious, 0
+    for _ in range(settings.TYPING_PROMOTION_LOGINS):
+        profile, clean_logins = update_typing_profile(
+            profile, clean_logins, bot_check=False, logged_in=True
+        )
+    assert (profile, clean_logins) == (TypingProfile.fast_human, 0)
+
+    for _ in range(settings.TYPING_PROMOTION_LOGINS):
+        profile, clean_logins = update_typing_profile(
+            profile, clean_logins, bot_check=False, logged_in=True
+        )
+    assert profile == TypingProfile.instant
+
+
+def test_bot_check_demotes_to_cautious():
+    assert update_typing_profile(
+        TypingProfile.instant, 2, bot_check=True, logged_in=True
+    ) == (TypingProfile.cautious, 0)
+
+
+def test_failed_login_keeps_profile():
+    assert update_typing_profile(
+        TypingProfile.fast_human, 1, bot_check=False, logged_in=False
+    ) == (TypingProfile.fast_human, 1)
+
+
+def test_profile_is_stored_in_automation_steps_json():
+    # Websites saved before profiles existed start cautious
+    assert StepReplay({}).automation_steps.typing_profile == (
+        TypingProfile.cautious
+    )
+
+    steps = StepReplay(None)
+    steps.automation_steps.typing_profile = TypingProfile.fast_human
+    steps.automation_steps.clean_logins = 2
+    reloaded = StepReplay(steps.automation_steps.model_dump(mode="json"))
+
+    assert reloaded.automation_steps.typing_profile == TypingProfile.fast_human
+    assert reloaded.automation_steps.clean_logins == 2
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+from playwright.async_api import TimeoutError
+
+from backend.scrapers import waits
+from backend.scrapers.waits import (
+    WaitStats,
+    collect_wait_stats,
+    wait_for_settle,
+)
+
+
+class FakePage:
+    def __init__(self, busy_for: float) -> None:
+        # The DOM keeps changing for `busy_for` seconds after the page loads
+        self.busy_until = time.perf_counter() + busy_for
+
+    async def wait_for_load_state(self, state: str, timeout: float) -> None:
+        if state == "networkidle" and self.busy_until > time.perf_counter():
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError("network is busy")
+
+    async def evaluate(self, script: str, arguments: list[float]) -> bool:
+        # Same loop as DOM_QUIET_SCRIPT
+        quiet, timeout = (value / 1000 for value in arguments)
+        start = last_change = time.perf_counter()
+        while True:
+            now = time.perf_counter()
+            if now < self.busy_until:
+                last_change = now
+            if now - last_change >= quiet:
+                return True
+            if now - start >= timeout:
+                return False
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def settle_settings(monkeypatch):
+    monkeypatch.setattr(waits.settings, "SETTLE_TIMEOUT", 5.0)
+    monkeypatch.setattr(waits.settings, "SETTLE_NETWORK_TIMEOUT", 0.1)
+    monkeypatch.setattr(waits.settings, "SETTLE_DOM_QUIET", 0.05)
+    monkeypatch.setattr(waits.settings, "SETTLE_DOM_TIMEOUT", 0.3)
+
+
+def test_wait_stats_sum_durations_and_timeouts():
+    stats = WaitStats()
+
+    stats.record("dom_quiet", 0.25, True)
+    stats.record("dom_quiet", 1.5, False)
+    stats.record("load", 0.1, True)
+
+    assert stats.stats() == {
+        "dom_quiet": {"count": 2, "total": 1.75, "max": 1.5, "timeouts": 1},
+        "load": {"count": 1, "total": 0.1, "max": 0.1, "timeouts": 0},
+    }
+    stats.reset()
+    assert stats.stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_quiet_page_settles_early(settle_settings):
+    stats = collect_wait_stats()
+    start = time.perf_counter()
+
+    assert await wait_for_settle(FakePage(busy_for=0))
+
+    assert time.perf_counter() - start < 0.2
+    assert stats.stats()["dom_quiet"]["timeouts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_changing_page_hits_dom_quiet_cap(settle_settings):
+    stats = collect_wait_stats()
+    start = time.perf_counter()
+
+    # Longer timeout of the whole settle does not make animations wait longer
+    assert not await wait_for_settle(FakePage(busy_for=60), timeout=5)
+
+    assert 0.3 <= time.perf_counter() - start < 0.6
+    assert stats.stats()["dom_quiet"]["timeouts"] == 1
+    assert stats.stats()["network_idle"]["timeouts"] == 1
@@ -0,0 +1,93 @@
+import random
+
+from playwright.async_api import Error, Locator, Page
+
+from backend.config import settings
+from backend.database.models import TypingProfile
+from backend.logging import get_logger
+
+logger = get_logger()
+
+# Delay between key presses in milliseconds
+TYPING_DELAYS = {
+    TypingProfile.fast_human: (20, 80),
+    TypingProfile.cautious: (500, 1000),
+}
+PROMOTIONS = {
+    TypingProfile.cautious: TypingProfile.fast_human,
+    TypingProfile.fast_human: TypingProfile.instant,
+}
+
+BOT_CHECK_SCRIPT = """
+() => {
+    // Only a challenge the user would see counts, invisible reCAPTCHA and its
+    // badge are on many pages that never show one
+    const isShown = (element) => {
+        if (/size=invisible/.test(element.getAttribute("src") || "") || element.getAttribute("data-size") === "invisible") {
+            return false;
+        }
+        const box = element.getBoundingClientRect();
+        const style = window.getComputedStyle(element);
+        return box.width >= 30 && box.height >= 30
+            && box.bottom > 0 && box.right > 0 && box.top < window.innerHeight && box.left < window.innerWidth
+            && style.visibility !== "hidden" && style.opacity !== "0";
+    };
+    const challenges = Array.from(document.querySelectorAll([
+        'iframe[src*="recaptcha"]',
+        'iframe[src*="hcaptcha"]',
+        'iframe[src*="challenges.cloudflare.com"]',
+        'iframe[src*="arkoselabs"]',
+        ".g-recaptcha",
+        ".h-captcha",
+        ".cf-turnstile",
+        "#px-captcha",
+        '[id*="captcha" i]',
+    ].join(", "))).filter(isShown);
+    const text = document.body ? document.body.innerText.slice(0, 5000) : "";
+    return challenges.length > 0 || /verify you are (a )?human|unusual traffic|are you a robot|press (and|&) hold/i.test(text);
+}
+"""
+
+
+async def type_text(
+    element: Locator,
+    value: str,
+    profile: TypingProfile,
+    timeout: float | None = None,
+) -> None:
+    timeout = timeout * 1000 if timeout else None
+    if profile == TypingProfile.instant:
+        await element.fill(value, timeout=timeout)
+        return
+    await element.press_sequentially(
+        value, delay=random.randint(*TYPING_DELAYS[profile]), timeout=timeout
+    )
+
+
+async def detect_bot_check(page: Page) -> bool:
+    try:
+        return await page.evaluate(BOT_CHECK_SCRIPT)
+    except Error as e:
+        logger.error(f"Could not check page for bot detection: {e}")
+        return False
+
+
+def update_typing_profile(
+    profile: TypingProfile, clean_logins: int, bot_check: bool, logged_in: bool
+) -> tuple[TypingProfile, int]:
+    if bot_check:
+        # Website noticed us, go back to typing like a careful human
+        return TypingProfile.cautious, 0
+    if not logged_in:
+        return profile, clean_logins
+
+    clean_logins += 1
+    if (
+        profile in PROMOTIONS
+        and clean_logins >= settings.TYPING_PROMOTION_LOGINS
+    ):
+        logger.info(
+            f"Promoting typing profile {profile} to {PROMOTIONS[profile]}"
+        )
+        return PROMOTIONS[profile], 0
+    return profile, clean_logins
@@ -1,144 +1,254 @@
 import asyncio
 import json
-import random
 
-import tiktoken
-from bs4 import BeautifulSoup
-from playwright.async_api import Locator, Page, TimeoutError
+from playwright.async_api import Error, Locator, Page, TimeoutError
 
 from backend.config import settings
-from backend.database.models import AttributeType, Step
-from backend.llm import send_req_to_llm
+from backend.database.models import (
+    AttributeType,
+    Step,
+    StepSelector,
+    TypingProfile,
+)
+from backend.llm import forget_llm_response, send_req_to_llm
+from backend.llm.decisions import (
+    forget_decision,
+    send_decision_req_to_llm,
+    send_index_req_to_llm,
+)
+from backend.llm.telemetry import get_caller, llm_caller
+from backend.llm.tokens import count_tokens
 from backend.logging import get_logger
+from backend.scrapers.chunking import split_into_chunks
+from backend.scrapers.cleaner import clean_html
+from backend.scrapers.page_cache import page_cache
+from backend.scrapers.probing import (
+    Probe,
+    count_probes,
+    get_element_selectors,
+    get_probes,
+    get_role_locator,
+)
+from backend.scrapers.selectors import attribute_selector, id_selector
+from backend.scrapers.snapshot import get_marker_locator, get_page_snapshot
+from backend.scrapers.typing_profiles import type_text
+from backend.scrapers.waits import wait_for_settle
 
-TIK = tiktoken.encoding_for_model("gpt-5-")
 logger = get_logger()
 
 
 async def goto(page: Page, link: str, retry: int = 3) -> None:
     done = False
-    while not done and retry > 0:
-        try:
-            await page.goto(link)
-            await page.wait_for_load_state("load")
-            await asyncio.sleep(3)
-            done = True
-        except TimeoutError:
-            logger.exception("Timeout for goto")
-        retry -= 1
-
-
-async def click(element: None | Locator, page: Page, retry: int = 3) -> bool:
+    try:
+        while not done and retry > 0:
+            try:
+                await page.goto(link)
+                await wait_for_settle(page)
+                done = True
+            except TimeoutError:
+                logger.exception("Timeout for goto")
+            retry -= 1
+    finally:
+        page_cache.invalidate(page)
+
+
+async def click(
+    element: None | Locator,
+    page: Page,
+    retry: int = 3,
+    timeout: float | None = None,
+) -> bool:
     if not element:
         logger.exception("Button/Link is None")
         return False
 
-    while retry > 0:
-        try:
-            if settings.DEBUG:
-                await element.highlight()
-                await asyncio.sleep(3)
-            await element.click()
-            await page.wait_for_load_state("load")
-            await asyncio.sleep(3)
-            return True
-        except TimeoutError:
-            logger.exception("Timeout for click")
-        retry -= 1
-    return False
+    try:
+        while retry > 0:
+            try:
+                if settings.DEBUG:
+                    await element.highlight()
+                    await asyncio.sleep(settings.DEBUG_HIGHLIGHT_DELAY)
+                await element.click(timeout=timeout * 1000 if timeout else None)
+                await wait_for_settle(page)
+                return True
+            except TimeoutError:
+                logger.exception("Timeout for click")
+            except Error as e:
+                # E.g. element is detached or not clickable, retrying will not
+                # help
+                logger.error(f"Could not click element: {e}")
+                return False
+            retry -= 1
+        return False
+    finally:
+        page_cache.invalidate(page)
 
 
-async def fill(element: None | Locator, value: str, retry: int = 3) -> bool:
+async def fill(
+    element: None | Locator,
+    value: str,
+    retry: int = 3,
+    profile: TypingProfile = TypingProfile.cautious,
+    timeout: float | None = None,
+) -> bool:
     if not element:
         logger.error("Could not find input field")
         return False
 
-    while retry > 0:
-        try:
-            if settings.DEBUG:
-                await element.highlight()
-                await asyncio.sleep(3)
-            await element.press_sequentially(
-                value, delay=random.randint(5, 10) * 100
-            )
-            return True
-        except TimeoutError:
-            logger.exception("Timeout for fill")
-        retry -= 1
-    return False
+    try:
+        while retry > 0:
+            try:
+                if settings.DEBUG:
+                    await element.highlight()
+                    await asyncio.sleep(settings.DEBUG_HIGHLIGHT_DELAY)
+                await type_text(element, value, profile, timeout)
+                return True
+            except TimeoutError:
+                logger.exception("Timeout for fill")
+            except Error as e:
+                # E.g. element is not an input, retrying will not help
+                logger.error(f"Could not fill element: {e}")
+                return False
+            retry -= 1
+        return False
+    finally:
+        page_cache.invalidate(element.page)
+
+
+async def get_page_content(page: Page, body_only: bool = False) -> str:
+    return await page_cache.get(
+        page,
+        f"html-{body_only}",
+        lambda: _load_page_content(page, body_only),
+    )
 
 
-async def get_page_content(page: Page) -> str:
-    # TODO: Make page content smaller by e.g. excluding head or code tags and only by including body
-    # TODO: Check in the future, whether regex would not be faster and overall better solution
+async def _load_page_content(page: Page, body_only: bool) -> str:
     # TODO: Add option to get important info about html tags and their content, then send all of it in json format to LLM
     page_content = await page.content()
+    cleaned_page_content = clean_html(page_content, body_only=body_only)
+    # Tokenizing whole pages is expensive, so it is only done for debugging
+    if settings.DEBUG:
+        logger.debug(
+            f"Amount of tokens before cleaning: {count_tokens(page_content)}, after cleaning: {count_tokens(cleaned_page_content)}"
+        )
+    return cleaned_page_content
 
-    logger.info(
-        f"Amount of tokens before cleaning: {len(TIK.encode(page_content))}"
-    )
-    soup = BeautifulSoup(page_content, "html.parser")
-    cleaned_page_content = ""
-    for tag in soup(
-        [
-            "head",
-            "meta",
-            "style",
-            "script",
-            "noscript",
-            "template",
-            "iframe",
-            "video",
-            "audio",
-            "map",
-            "area",
-            "embed",
-            "object",
-            "applet",
-            "track",
-            "canvas",
-            "svg",
-            "img",
-            "picture",
-            "source",
-        ]
-    ):
-        tag.decompose()
-        cleaned_page_content = str(soup)
-    logger.info(
-        f"Amount of tokens after cleaning: {len(TIK.encode(cleaned_page_content))}"
+
+async def get_element_search_content(page: Page, use_snapshot: bool) -> str:
+    if use_snapshot:
+        return await get_page_snapshot(page)
+    return await get_page_content(page)
+
+
+def get_attribute_prompts(
+    page_content: str, prompt: str, use_snapshot: bool
+) -> list[str]:
+    if use_snapshot:
+        pre_prompt = "I will give you a JSON outline of visible elements of a website, with their attributes, text and bounding boxes as [x, y, width, height]."
+        post_prompt = "Return only its aa-id and identifying attributes in JSON format with the following keys: aa-id, id, name, type, aria-label, placeholder, role, text, classList. If an attribute does not exist, return null for it, for classList return JSON list. Do not explain, only return JSON"
+    else:
+        pre_prompt = "I will give you an HTML snippet."
+        post_prompt = "Return only its identifying attributes in JSON format with the following keys: id, name, type, aria-label, placeholder, role, text, classList. If an attribute does not exist, return null for it, for classList return JSON list. Do not explain, only return JSON"
+
+    chunks = split_into_chunks(
+        page_content, settings.LLM_CHUNK_TOKENS, is_snapshot=use_snapshot
     )
-    return cleaned_page_content
+    if len(chunks) == 1:
+        return [f"{pre_prompt}{prompt}{post_prompt}\n{page_content}"]
+
+    # Page does not fit into one prompt, so every part is searched separately
+    # and the best of found elements is chosen at the end
+    chunk_prompt = f"{pre_prompt}This is only a part of the page.{prompt}If there is no such element in this part, return only null.{post_prompt}"
+    return [f"{chunk_prompt}\n{chunk}" for chunk in chunks]
 
 
 async def find_html_element_attributes(
-    page: Page | str, prompt: str
+    page: Page | str,
+    prompt: str,
+    use_snapshot: bool | None = None,
+    use_cache: bool = True,
 ) -> None | dict:
-    pre_prompt = "I will give you an HTML snippet."
-    post_prompt = "Return only its identifying attributes in JSON format with the following keys: id, name, type, aria-label, placeholder, role, text, classList. If an attribute does not exist, return null for it, for classList return JSON list. Do not explain, only return JSON"
+    if use_snapshot is None:
+        use_snapshot = settings.USE_PAGE_SNAPSHOT
     if type(page) is Page:
-        page_content = await get_page_content(page)
+        page_content = await get_element_search_content(page, use_snapshot)
     else:
         page_content = page
-    final_prompt = f"{pre_prompt}{prompt}{post_prompt}\n{page_content}"
 
-    response = await send_req_to_llm(
-        prompt=final_prompt,
-        use_openai=True,
+    prompts = get_attribute_prompts(page_content, prompt, use_snapshot)
+    if len(prompts) == 1:
+        return await _request_attributes(prompts[0], use_cache)
+
+    logger.info(f"Searching for element in {len(prompts)} page chunks")
+    # Tasks do not see the scraper method on their stack, so it is passed to
+    # them for telemetry
+    with llm_caller(get_caller()):
+        responses = await asyncio.gather(
+            *(
+                _request_attributes(chunk_prompt, use_cache)
+                for chunk_prompt in prompts
+            )
+        )
+    candidates = [
+        attributes
+        for attributes in responses
+        if attributes and any(attributes.values())
+    ]
+    if len(candidates) < 2:
+        return candidates[0] if candidates else None
+
+    ranking_prompt = f"These elements were found in different parts of a website: {json.dumps(dict(enumerate(candidates)))}. Choose the one that suits this description the most: '{prompt}'. Return only its number."
+    index = await send_index_req_to_llm(
+        prompt=ranking_prompt, use_cache=use_cache
     )
+    if index is None or not 0 <= index < len(candidates):
+        logger.error(f"LLM did not choose a valid candidate index: {index}")
+        return candidates[0]
+    return candidates[index]
 
-    try:
-        attributes = json.loads(response)
-        logger.info(
-            f"Type of attributes: {type(attributes)}, attributes:\n{json.dumps(attributes, indent=2)}"
+
+async def forget_html_element_attributes(
+    page_content: str, prompt: str, use_snapshot: bool
+) -> None:
+    await asyncio.gather(
+        *(
+            forget_llm_response(attribute_prompt, escalate=escalate)
+            for attribute_prompt in get_attribute_prompts(
+                page_content, prompt, use_snapshot
+            )
+            for escalate in (False, True)
+        )
+    )
+
+
+async def _request_attributes(
+    prompt: str, use_cache: bool = True
+) -> None | dict:
+    # A broken answer is asked once more from a stronger model
+    for escalate in (False, True):
+        response = await send_req_to_llm(
+            prompt=prompt,
+            use_openai=True,
+            use_cache=use_cache,
+            escalate=escalate,
         )
-        if type(attributes) is not dict:
-            return None
-    except json.JSONDecodeError:
-        logger.exception("Error while parsing attributes json")
-        return None
 
-    return attributes
+        try:
+            attributes = json.loads(response)
+            logger.info(
+                f"Type of attributes: {type(attributes)}, attributes:\n{json.dumps(attributes, indent=2)}"
+            )
+        except json.JSONDecodeError:
+            logger.exception("Error while parsing attributes json")
+            attributes = False
+
+        # Null means that the element is not there, anything else that is not
+        # an object is a broken answer, which would be replayed from the cache
+        if attributes is None or type(attributes) is dict:
+            return attributes
+        await forget_llm_response(prompt, escalate=escalate)
+    return None
 
 
 async def find_html_element(
@@ -146,200 +256,128 @@ async def find_html_element(
 ) -> tuple[None, None, None] | tuple[Locator, str, AttributeType]:
     logger.info(f"Prompt: {prompt}")
 
-    page_content = await get_page_content(page)
-    for _ in range(5):
-        attributes = await find_html_element_attributes(page_content, prompt)
+    use_snapshot = settings.USE_PAGE_SNAPSHOT
+    page_content = await get_element_search_content(page, use_snapshot)
+    for attempt in range(5):
+        # Retries ask the LLM again, a cached answer would be the same one
+        use_cache = attempt == 0
+        attributes = await find_html_element_attributes(
+            page_content, prompt, use_snapshot=use_snapshot, use_cache=use_cache
+        )
         if not attributes:
             return None, None, None
 
-        count_dict = {}
-
-        element_id = attributes.get("id", "")
-        locator = page.locator(f"#{element_id}")
-        count = await locator.count()
-        await log_locator(locator, message="Search by id", count=count)
-        if 0 < count < 2 and await verify_if_right_element_was_chosen(
-            locator.last, attributes, prompt
-        ):
-            return locator.last, element_id, AttributeType.id
-        elif count > 2:
-            count_dict[count] = await locator.all()
-
-        role = attributes.get("role", "")
-        if role:
-            if await locator.count() >= 2:
-                locator = locator.and_(page.get_by_role(role, exact=True))
-            else:
-                locator = page.get_by_role(role, exact=True)
-
-            count = await locator.count()
-            await log_locator(locator, message="Search by role", count=count)
-            if 0 < count < 2 and await verify_if_right_element_was_chosen(
-                locator.last, attributes, prompt
+        # Marked element is the one LLM has seen, so it does not need to be
+        # searched for and verified
+        marker = attributes.get("aa-id") if use_snapshot else None
+        if marker:
+            locator = get_marker_locator(page, str(marker))
+            if await locator.count() == 1:
+                logger.info(f"Found element by marker: {marker}")
+                return locator, *await get_stable_attribute(page, locator)
+            logger.error(f"Element with marker {marker} is not on the page")
+
+        probes = get_probes(page, attributes)
+        await count_probes(probes)
+
+        # Unique match of the most specific attribute is the best guess
+        for probe in probes:
+            if probe.count == 1 and await verify_if_right_element_was_chosen(
+                probe.locator, attributes, prompt
             ):
-                return locator.last, role, AttributeType.text
-            elif count > 2:
-                count_dict[count] = await locator.all()
-
-        text = attributes.get("text", "")
-        logger.info(f"Search by text: {text}")
-        if text:
-            if await locator.count() >= 2:
-                locator = locator.and_(page.get_by_text(text, exact=True))
-            else:
-                locator = page.get_by_text(text, exact=True)
-
+                return probe.locator, probe.attribute, probe.attribute_type
+
+        # Attributes that match many elements on their own can still match
+        # only one together
+        ambiguous = [probe for probe in probes if probe.count > 1]
+        candidates = None
+        if len(ambiguous) > 1:
+            locator = ambiguous[0].locator
+            for probe in ambiguous[1:]:
+                locator = locator.and_(probe.locator)
             count = await locator.count()
-            await log_locator(locator, message="Search by text", count=count)
-            if 0 < count < 2 and await verify_if_right_element_was_chosen(
-                locator.last, attributes, prompt
+            if count == 1 and await verify_if_right_element_was_chosen(
+                locator, attributes, prompt
             ):
-                return locator.last, text, AttributeType.text
-            elif count > 2:
-                count_dict[count] = await locator.all()
-
-        aria_label = attributes.get("aria-label", "")
-        if aria_label:
-            if await locator.count() >= 2:
-                locator = locator.and_(
-                    page.get_by_label(aria_label, exact=True)
+                # Attributes match many elements on their own, so the element
+                # is saved by its path, which is unique
+                css_path = next(
+                    (
+                        selector
+                        for selector in await get_element_selectors(locator)
+                        if selector.attribute_type == AttributeType.css_path
+                    ),
+                    None,
                 )
-            else:
-                locator = page.get_by_label(aria_label, exact=True)
-            count = await locator.count()
-            await log_locator(
-                locator, message="Search by aria_label", count=count
-            )
-            if 0 < count < 2 and await verify_if_right_element_was_chosen(
-                locator.last, attributes, prompt
-            ):
-                return locator.last, aria_label, AttributeType.aria_label
-            elif count > 2:
-                count_dict[count] = await locator.all()
-
-        name = attributes.get("name", "")
-        if name:
-            if await locator.count() >= 2:
-                locator = locator.and_(page.locator(f'[name="{name}"]'))
-            else:
-                locator = page.locator(f'[name="{name}"]')
-            count = await locator.count()
-            await log_locator(locator, message="Search by name", count=count)
-            if 0 < count < 2 and await verify_if_right_element_was_chosen(
-                locator.last, attributes, prompt
-            ):
-                return locator.last, name, AttributeType.name
-            elif count > 2:
-                count_dict[count] = await locator.all()
-
-        placeholder = attributes.get("placeholder", "")
-        if placeholder:
-            if await locator.count() >= 2:
-                locator = locator.and_(
-                    page.get_by_placeholder(placeholder, exact=True)
+                if css_path is None:
+                    return locator, None, None
+                return (
+                    locator,
+                    css_path.html_element_attribute,
+                    css_path.attribute_type,
                 )
-            else:
-                locator = page.get_by_placeholder(placeholder, exact=True)
-
-            count = await locator.count()
-            await log_locator(
-                locator, message="Search by placeholder", count=count
+            if count > 1:
+                candidates = locator
+        if candidates is None and ambiguous:
+            candidates = min(ambiguous, key=lambda probe: probe.count).locator
+
+        if additional_llm and candidates is not None:
+            elements = await candidates.all()
+            inner_texts = await asyncio.gather(
+                *(element.all_inner_texts() for element in elements)
             )
-            if 0 < count < 2 and await verify_if_right_element_was_chosen(
-                locator.last, attributes, prompt
-            ):
-                return locator.last, placeholder, AttributeType.element_type
-            elif count > 2:
-                count_dict[count] = await locator.all()
-
-        element_type = attributes.get("type", "")
-        if element_type:
-            if await locator.count() >= 2:
-                locator = locator.and_(page.locator(f'[type="{element_type}"]'))
-            else:
-                locator = page.locator(f'[type="{element_type}"]')
-
-            count = await locator.count()
-            await log_locator(locator, message="Search by type", count=count)
-            if 0 < count < 2 and await verify_if_right_element_was_chosen(
-                locator.last, attributes, prompt
-            ):
-                return locator.last, element_type, AttributeType.element_type
-            elif count > 2:
-                count_dict[count] = await locator.all()
-
-        class_list = attributes.get("classList", [])
-        # FIXME: playwright._impl._errors.Error: Locator.count: SyntaxError: Failed to execute 'querySelectorAll' on 'Document': '.tw-w-[120px]' is not a valid selector.
-        logger.info(f"Class_list type: {type(class_list)}, {class_list}")
-        if class_list:
-            class_selector = f".{'.'.join(class_list)}"
-            if await locator.count() >= 2:
-                locator = locator.and_(page.locator(class_selector))
-            else:
-                locator = page.locator(class_selector)
-            count = await locator.count()
-            if 0 < count < 2 and await verify_if_right_element_was_chosen(
-                locator.last, attributes, prompt
-            ):
-                return locator.last, class_selector, AttributeType.class_l
-            elif count > 2:
-                count_dict[count] = await locator.all()
-            # for class_l in class_list:
-            #     if await locator.count() >= 2:
-            #         locator = locator.and_(page.locator(f".{class_l}"))
-            #         # locator = locator.filter(has=page.locator(f".{class_l}"))
-            #     else:
-            #         locator = page.locator(f".{class_l}")
-            #     count = await locator.count()
-            #     await log_locator(
-            #         locator,
-            #         message="Search by class",
-            #         count=count,
-            #         class_l=class_l,
-            #     )
-            #     if 0 < count < 2 and await verify_if_right_element_was_chosen(
-            #         locator.last, attributes, prompt
-            #     ):
-            #         return locator.last, class_l, AttributeType.class_l
-            #     elif count > 2:
-            #         count_dict[count] = await locator.all()
-
-        # TODO: Add LLM element choosing
-        if additional_llm:
             prompt_elements = "Compare and choose one locator from these that suit the prompt the most, return only the number, that represents the locator in the list, list starts from index 0."
-            # TODO: We are choosing wrong item from dict by count
-            for locator in count_dict[min(count_dict, key=count_dict.get)]:
-                prompt_elements += f"{await locator.all_inner_texts()}, "
+            prompt_elements += "".join(
+                f"{inner_text}, " for inner_text in inner_texts
+            )
             prompt_elements += prompt
             logger.info(
-                f"Chosen this count: {min(count_dict, key=count_dict.get)}, this is the prompt:\n{prompt_elements}"
+                f"Choosing one of {len(elements)} elements, this is the prompt:\n{prompt_elements}"
             )
 
-            response = await send_req_to_llm(
-                prompt=prompt_elements, use_openai=True
+            num_in_list = await send_index_req_to_llm(
+                prompt=prompt_elements, use_cache=use_cache
             )
             try:
-                num_in_list = int(response)
-                return (
-                    count_dict[min(count_dict, key=count_dict.get)][
-                        num_in_list
-                    ],
-                    None,
-                    None,
-                )
-            except ValueError:
+                return elements[num_in_list], None, None
+            except (IndexError, TypeError):
                 logger.exception(
-                    f"ValueError while casting LLM response for locators: {response}"
+                    f"LLM did not choose a valid locator index: {num_in_list}"
                 )
 
+        # Rejected answer would otherwise be repeated on every following run
+        await forget_html_element_attributes(page_content, prompt, use_snapshot)
+
     return None, None, None
 
 
+async def get_stable_attribute(
+    page: Page, locator: Locator
+) -> tuple[str, AttributeType] | tuple[None, None]:
+    # Markers exist only on the current page, so steps are saved with the most
+    # specific attribute the element really has that finds only this element
+    probes = [
+        Probe(
+            selector.attribute_type.value,
+            selector_locator,
+            selector.html_element_attribute,
+            selector.attribute_type,
+        )
+        for selector in await get_element_selectors(locator)
+        if (selector_locator := await get_locator(page, selector)) is not None
+    ]
+    await count_probes(probes)
+    for probe in probes:
+        if probe.count == 1:
+            return probe.attribute, probe.attribute_type
+    return None, None
+
+
 async def verify_if_right_element_was_chosen(
     locator: Locator, attributes: dict, prompt: str
 ) -> bool:
     check_prompt = f"Verify if right element from website was chosen comparing element data: {await locator.all_inner_texts()}, {attributes}, and prompt: '{prompt}'. Return 'True' if right element was chosen, otherwise 'False'."
-    if "True" in await send_req_to_llm(prompt=check_prompt, use_openai=True):
+    if await send_decision_req_to_llm(prompt=check_prompt):
         logger.info(
             f"LLM thinks this element:\n{json.dumps(attributes, indent=2)}\nSuits this prompt: {prompt}"
         )
@@ -347,33 +385,31 @@ async def verify_if_right_element_was_chosen(
     logger.error(
         f"LLM thinks this element:\n{json.dumps(attributes, indent=2)}\nDoes not suit this prompt: {prompt}"
     )
+    # Only confirmations are replayed, a rejection is asked again next time
+    await forget_decision(check_prompt)
     return False
 
 
-async def get_locator(page: Page, step: Step) -> Locator | None:
+async def get_locator(page: Page, step: Step | StepSelector) -> Locator | None:
     attribute_type = step.attribute_type
     attribute = step.html_element_attribute
     if attribute_type == AttributeType.id:
-        return page.locator(f"#{attribute}")
+        return page.locator(id_selector(attribute))
     elif attribute_type == AttributeType.text:
         return page.get_by_text(attribute)
     elif attribute_type == AttributeType.aria_label:
         return page.get_by_label(attribute)
     elif attribute_type == AttributeType.name:
-        return page.locator(f'[name="{attribute}"]')
+        return page.locator(attribute_selector("name", attribute))
     elif attribute_type == AttributeType.element_type:
-        return page.locator(f'[type="{attribute}"]')
+        return page.locator(attribute_selector("type", attribute))
+    elif attribute_type == AttributeType.placeholder:
+        return page.get_by_placeholder(attribute, exact=True)
     elif attribute_type == AttributeType.class_l:
-        return page.locator(f".{attribute}")
+        # Compiled selector, class names in it are already escaped
+        return page.locator(f".{attribute.removeprefix('.')}")
+    elif attribute_type == AttributeType.role:
+        return get_role_locator(page, attribute)
+    elif attribute_type == AttributeType.css_path:
+        return page.locator(attribute)
     return None
-
-
-async def log_locator(
-    locator: None | Locator, message: str = "", **kwargs
-) -> None:
-    if locator is None:
-        logger.info(f"The locator is None, other data:\n{kwargs}\n")
-    else:
-        logger.info(
-            f"{message}\n{await locator.all()}\nother data:\n{kwargs}\n"
-        )
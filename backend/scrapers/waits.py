@@ -0,0 +1,162 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable
+
+from playwright.async_api import Error, Locator, Page, TimeoutError
+
+from backend.config import settings
+from backend.logging import get_logger
+from backend.scrapers.page_cache import MUTATION_COUNTER_SCRIPT
+
+logger = get_logger()
+
+# Resolves once the mutation counter did not change for `quietMs`, the counter
+# is installed here too for pages opened before the init script was added
+DOM_QUIET_SCRIPT = f"""
+([quietMs, timeoutMs]) => new Promise((resolve) => {{
+    {MUTATION_COUNTER_SCRIPT};
+    const start = performance.now();
+    let mutations = window.__aaMutations;
+    let lastChange = start;
+    const check = () => {{
+        const now = performance.now();
+        if (window.__aaMutations !== mutations) {{
+            mutations = window.__aaMutations;
+            lastChange = now;
+        }}
+        if (now - lastChange >= quietMs) {{
+            resolve(true);
+        }} else if (now - start >= timeoutMs) {{
+            resolve(false);
+        }} else {{
+            setTimeout(check, 50);
+        }}
+    }};
+    check();
+}})
+"""
+
+
+class WaitStats:
+    def __init__(self) -> None:
+        self._waits: dict[str, dict[str, float]] = {}
+
+    def record(self, kind: str, seconds: float, settled: bool) -> None:
+        wait = self._waits.setdefault(
+            kind, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0}
+        )
+        wait["count"] += 1
+        wait["total"] += seconds
+        wait["max"] = max(wait["max"], seconds)
+        if not settled:
+            wait["timeouts"] += 1
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {
+            kind: {
+                **wait,
+                "total": round(wait["total"], 3),
+                "max": round(wait["max"], 3),
+            }
+            for kind, wait in self._waits.items()
+        }
+
+    def reset(self) -> None:
+        self._waits.clear()
+
+
+_wait_stats: ContextVar[WaitStats | None] = ContextVar(
+    "wait_stats", default=None
+)
+
+
+def collect_wait_stats() -> WaitStats:
+    # Every scraping run gets its own stats, so runs of other users do not
+    # mix with them
+    stats = WaitStats()
+    _wait_stats.set(stats)
+    return stats
+
+
+def _record_wait(kind: str, seconds: float, settled: bool) -> None:
+    stats = _wait_stats.get()
+    if stats is not None:
+        stats.record(kind, seconds, settled)
+
+
+async def _timed(kind: str, wait: Awaitable[Any]) -> bool:
+    start = time.perf_counter()
+    try:
+        # Only the DOM quiet script tells about its timeout by returning False
+        settled = await wait is not False
+    except TimeoutError:
+        settled = False
+    except Error as e:
+        # Page navigated away or was closed while waiting
+        logger.debug(f"{kind} wait interrupted: {e}")
+        settled = False
+    _record_wait(kind, time.perf_counter() - start, settled)
+    return settled
+
+
+async def wait_for_load(page: Page, timeout: float | None = None) -> bool:
+    timeout = timeout or settings.SETTLE_TIMEOUT
+    return await _timed(
+        "load", page.wait_for_load_state("load", timeout=timeout * 1000)
+    )
+
+
+async def wait_for_network_idle(
+    page: Page, timeout: float | None = None
+) -> bool:
+    # Pages with long polling or analytics never get idle, so this is capped
+    # lower than the other waits
+    timeout = timeout or settings.SETTLE_NETWORK_TIMEOUT
+    return await _timed(
+        "network_idle",
+        page.wait_for_load_state("networkidle", timeout=timeout * 1000),
+    )
+
+
+async def wait_for_dom_quiet(
+    page: Page, quiet: float | None = None, timeout: float | None = None
+) -> bool:
+    quiet = quiet or settings.SETTLE_DOM_QUIET
+    timeout = min(
+        timeout or settings.SETTLE_DOM_TIMEOUT, settings.SETTLE_DOM_TIMEOUT
+    )
+    return await _timed(
+        "dom_quiet",
+        page.evaluate(DOM_QUIET_SCRIPT, [quiet * 1000, timeout * 1000]),
+    )
+
+
+async def wait_for_target(
+    target: Locator, timeout: float | None = None
+) -> bool:
+    timeout = timeout or settings.SETTLE_TIMEOUT
+    return await _timed(
+        "target", target.wait_for(state="visible", timeout=timeout * 1000)
+    )
+
+
+async def wait_for_settle(
+    page: Page, target: Locator | None = None, timeout: float | None = None
+) -> bool:
+    # Fast pages go on as soon as they are quiet, pages that keep polling the
+    # network or animating are given up on after the timeout
+    start = time.perf_counter()
+    await wait_for_load(page, timeout)
+    network_idle, dom_quiet = await asyncio.gather(
+        wait_for_network_idle(page),
+        wait_for_dom_quiet(page, timeout=timeout),
+    )
+    settled = dom_quiet
+    if target is not None:
+        settled = await wait_for_target(target, timeout)
+    _record_wait("settle", time.perf_counter() - start, settled)
+    logger.debug(
+        f"Page settled in {time.perf_counter() - start:.2f}s, {network_idle=}, {dom_quiet=}"
+    )
+    return settled